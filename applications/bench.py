@@ -1,21 +1,36 @@
 #!/usr/bin/env python3
 
+from applications.parsers import DurationParser
+
 class Benchmark():
 
     name = None
     threads = None
+    dataset = None
+    arch = None
     env = {}
     cmdline = None
 
     def __init__(self, args, config):
         self.name = args.bench
         self.threads = int(args.num_threads)
+        self.env = {}
 
     def prepare(self):
         pass
 
-    def format_results(self, stdout, stderr):
-        pass
+    def parser(self):
+        # Parser turning the output of one run into result rows
+        return DurationParser(self)
+
+    def input_files(self):
+        # Files or directories read by the runs, for page cache control
+        return []
+
+    def scratch_dirs(self):
+        # Directories the runs write to, copied for each run when runs of
+        # the same prepared benchmark execute concurrently
+        return []
 
     def cleanup(self):
         pass
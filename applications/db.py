@@ -1,19 +1,29 @@
 #!/usr/bin/env python3
 
-import logging, os
-import pandas as pd
+import logging, os, re, shutil, tempfile
 
 from applications.bench import Benchmark
+from applications.parsers import DurationParser
 
 archs = {
     "x86_64": "amd64-linux.gcc",
     "aarch64": "aarch64-linux.gcc"
 }
 
+# speedtest1 options that can be set through the dataset, e.g. -d size=50,journal=wal
+journal_modes = [ 'delete', 'truncate', 'persist', 'memory', 'wal', 'off' ]
+dataset_options = {
+    'size': re.compile(r"^\d+$"),
+    'cachesize': re.compile(r"^-?\d+$"),
+    'journal': re.compile(r"^(" + "|".join(journal_modes) + r")$")
+}
+
 class SQLite(Benchmark):
 
     sqlite_dir = None
     app = 'sqlite-speedtest1'
+    options = None
+    tmpdir = None
 
     def __init__(self, args, config):
         super().__init__(args, config)
@@ -25,45 +35,72 @@ class SQLite(Benchmark):
             exit(1)
         self.arch = args.arch
 
+        # Check dataset
+        self.options = {}
+        if args.dataset is not None and args.dataset != 'none':
+            for opt in args.dataset.split(','):
+                key, _, val = opt.partition('=')
+                if key not in dataset_options or dataset_options[key].match(val) is None:
+                    logging.error(f"Dataset not supported by Sqlite. Should be a list of key=value with keys among {list(dataset_options.keys())} and journal among {journal_modes}")
+                    exit(1)
+                self.options[key] = val
+            self.dataset = args.dataset
+
     def prepare(self):
         super().prepare()
 
         self.cmdline = [ self.sqlite_dir + '/speedtest1', '--multithread', '--threads', str(self.threads) ]
+        for key, val in self.options.items():
+            self.cmdline += [ f"--{key}", val ]
+        # Journal modes only make sense with a database file of our own
+        if 'journal' in self.options:
+            self.tmpdir = tempfile.mkdtemp(prefix=f"{self.app}.")
+            self.cmdline.append(f"{self.tmpdir}/speedtest1.db")
 
-    def format_output(self, stdout, stderr):
-        df = pd.DataFrame()
-        stdout.seek(0)
-        for l in stdout:
-            if "bench.py" in l:
-                duration = float(l.split(' ')[2])
-                retval = int(l.split(' ')[7])
-                df = df.append({ 'bench': self.app,
-                                 'dataset': 'none',
-                                 'arch': self.arch,
-                                 'threads': int(self.threads),
-                                 'cmdline': ' '.join(self.cmdline),
-                                 'unit': 'seconds',
-                                 'retval': retval,
-                                 'value': duration }, ignore_index=True)
-
-        if len(df) == 0:
-            return None
-        return df
+    def parser(self):
+        return SpeedtestParser(self, bench=self.app)
+
+    def scratch_dirs(self):
+        return [ self.tmpdir ] if self.tmpdir is not None else []
 
     def cleanup(self):
-        pass
+        if self.tmpdir is not None:
+            shutil.rmtree(self.tmpdir)
 
     def __str__(self):
         ret = "<"
         ret += "name="+self.name
         ret += ", threads="+str(self.threads)
-        ret += ", dataset=none"
+        ret += f", dataset={self.dataset if self.dataset is not None else 'none'}"
         ret += ", arch="+self.arch
         ret += ", cmdline: " + str(self.cmdline)
         ret += ">"
         return ret
 
 
+class SpeedtestParser(DurationParser):
+
+    # One row per numbered test, e.g.
+    #  " 100 - 50000 INSERTs into table with no index.......    0.071s"
+    # plus the TOTAL line and the wall-clock time of the whole run. The
+    # timings of speedtest1 itself are of kind 'internal': they do not
+    # include process startup and are not used to decide convergence.
+
+    test_re = re.compile(r"^\s*(\d+) - (.*?)\.*\s+(\d+\.\d+)s\s*$")
+    total_re = re.compile(r"^\s*TOTAL\.*\s+(\d+\.\d+)s\s*$")
+
+    def feed(self, line):
+        m = self.test_re.match(line)
+        if m is not None:
+            self.record(bench=f"{self.bench.app}-{m.group(1)}", test=f"{m.group(1)} - {m.group(2)}",
+                        unit='seconds', kind='internal', value=float(m.group(3)))
+            return
+        m = self.total_re.match(line)
+        if m is not None:
+            self.record(bench=f"{self.bench.app}-total", test="TOTAL", unit='seconds', kind='internal',
+                        value=float(m.group(1)))
+
+
 class DbFactory():
 
     apps = {
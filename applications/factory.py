@@ -1,22 +1,23 @@
 #!/usr/bin/env python3
 
-from applications.parsec import ParsecFactory
-from applications.phoenix import PhoenixFactory
-from applications.db import DbFactory
-from applications.openssl import OpensslFactory
-from applications.microbench import MicrobenchFactory
+import importlib, logging
+
+# Benchmark prefix -> module and factory of the suite. Suites are only
+# imported when one of their benchmarks is requested, so that short runs
+# do not pay for the startup of every suite.
+suites = {
+    "parsec.": ("applications.parsec", "ParsecFactory"),
+    "phoenix.": ("applications.phoenix", "PhoenixFactory"),
+    "db.": ("applications.db", "DbFactory"),
+    "openssl.": ("applications.openssl", "OpensslFactory"),
+    "micro.": ("applications.microbench", "MicrobenchFactory")
+}
 
 class BenchmarkFactory():
 
     def create(args, config):
-        if args.bench.startswith('parsec.'):
-            return ParsecFactory.create(args, config)
-        if args.bench.startswith('phoenix.'):
-            return PhoenixFactory.create(args, config)
-        if args.bench.startswith('db.'):
-            return DbFactory.create(args, config)
-        if args.bench.startswith("openssl."):
-            return OpensslFactory.create(args, config)
-        if args.bench.startswith("micro."):
-            return MicrobenchFactory.create(args, config)
+        for prefix, (module, factory) in suites.items():
+            if args.bench.startswith(prefix):
+                logging.debug(f"Loading suite {module}")
+                return getattr(importlib.import_module(module), factory).create(args, config)
         return None
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+import bisect, logging, random, re, string, struct
+from array import array
+
+from cache import parse_size
+
+# Seeded generators of Phoenix inputs of any size. Output is written in
+# chunks, so memory use does not depend on the size of the file. Bump the
+# version whenever the output of a generator changes, it is part of the
+# cache key of generated inputs.
+version = 1
+chunk_size = 1 << 20
+
+# Datasets such as "2GB" or "512M,seed=42"
+dataset_re = re.compile(r"^(\d+(?:\.\d+)?[KMGT]?B?)(?:,seed=(\d+))?$", re.IGNORECASE)
+
+def parse_dataset(dataset):
+    # (size in bytes, seed), or None if dataset is not a generated one
+    m = dataset_re.match(dataset)
+    if m is None:
+        return None
+    return parse_size(m.group(1)), int(m.group(2)) if m.group(2) is not None else 0
+
+def write_stream(fp, size, chunk):
+    # Write chunk() results until size bytes have been written
+    written = 0
+    while written < size:
+        data = chunk(min(chunk_size, size - written))
+        data = data[:size - written]
+        fp.write(data)
+        written += len(data)
+
+def keyfile(rng, size, fp):
+    # Lines of random lowercase letters, 16 bytes per line on average, as
+    # read by linear_regression (pairs of chars) and string_match (lines)
+    table = bytes([ ord('\n') if i % 16 == 0 else ord(string.ascii_lowercase[i % 26]) for i in range(256) ])
+    write_stream(fp, size - 1, lambda n: rng.randbytes(n).translate(table))
+    fp.write(b'\n')
+
+def words(rng, size, fp):
+    # Words drawn from a vocabulary with a Zipf distribution, so that
+    # word_count sees a realistic mix of frequent and rare words
+    vocab = [ ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 12))).encode()
+              for _ in range(1 << 16) ]
+    cumulative = []
+    total = 0
+    for rank in range(len(vocab)):
+        total += 1 / (rank + 1)
+        cumulative.append(total)
+    lookup = [ min(bisect.bisect_left(cumulative, (u + 0.5) / (1 << 16) * total), len(vocab) - 1)
+               for u in range(1 << 16) ]
+    # 16-bit random value -> phrase of 4 words, ending a line one time out
+    # of 4. Joining phrases rather than single words keeps the generator
+    # close to disk speed, and word frequencies are unchanged.
+    entries = []
+    for u in range(1 << 16):
+        ws = [ vocab[lookup[i]] for i in rng.choices(range(1 << 16), k=4) ]
+        entries.append(b' '.join(ws) + (b'\n' if u % 4 == 0 else b' '))
+
+    def chunk(n):
+        idx = array('H')
+        # About 32 bytes per phrase
+        idx.frombytes(rng.randbytes(2 * (n // 32 + 16)))
+        return b''.join(map(entries.__getitem__, idx))
+
+    write_stream(fp, size - 1, chunk)
+    fp.write(b'\n')
+
+def bmp(rng, size, fp):
+    # 24-bit uncompressed bitmap of random pixels, 4096 pixels wide
+    width = 4096
+    row = width * 3
+    height = max(1, (size - 54) // row)
+    data_size = row * height
+    if 54 + data_size >= 1 << 32:
+        logging.error(f"Bitmaps are limited to 4GB, {size} bytes requested")
+        exit(1)
+    fp.write(struct.pack('<2sIHHI', b'BM', 54 + data_size, 0, 0, 54))
+    fp.write(struct.pack('<IiiHHIIiiII', 40, width, height, 1, 24, 0, data_size, 2835, 2835, 0, 0))
+    write_stream(fp, data_size, rng.randbytes)
+
+formats = {
+    'keyfile': keyfile,
+    'words': words,
+    'bmp': bmp
+}
+
+def generate(fmt, size, seed, path):
+    logging.info(f"Generating {size} bytes of {fmt} input (seed={seed}) into {path}")
+    # The format is part of the seed, so that formats do not share a stream
+    rng = random.Random(f"{fmt}-{seed}")
+    with open(path, 'wb') as fp:
+        formats[fmt](rng, size, fp)
@@ -1,9 +1,9 @@
 #!/usr/bin/env python3
 
-import logging, os
-import pandas as pd
+import logging, os, re
 
 from applications.bench import Benchmark
+from applications.parsers import KeyValueParser, ValueParser
 
 archs = [ 'x86_64', 'aarch64' ]
 
@@ -31,26 +31,8 @@ class Math(Benchmark):
         self.cmdline = [ self.binary_path ]
 
 
-    def format_output(self, stdout, stderr):
-        df = pd.DataFrame()
-        stdout.seek(0)
-        for l in stdout:
-            if "bench.py" in l:
-                retval = int(l.split(' ')[7])
-            else:
-                test, value = l.strip().split(',')
-                df = df.append({ 'bench': f"micro.{self.app}-{test}",
-                                 'dataset': 'none',
-                                 'arch': self.arch,
-                                 'threads': 1,
-                                 'cmdline': ' '.join(self.cmdline),
-                                 'unit': 'ops/ms',
-                                 'value': float(value) }, ignore_index=True)
-
-        df['retval'] = retval
-        if len(df) == 0:
-            return None
-        return df
+    def parser(self):
+        return KeyValueParser(self, ',', 'ops/ms', dataset='none', threads=1)
 
 
     def cleanup(self):
@@ -93,27 +75,8 @@ class Sqlite(Benchmark):
         self.cmdline = [ self.binary_path ] + [ f"{self.binary_dir}/test{i}.sql" for i in range(1, 17) ]
 
 
-    def format_output(self, stdout, stderr):
-        df = pd.DataFrame()
-        stdout.seek(0)
-        for l in stdout:
-            if "bench.py" in l:
-                retval = int(l.split(' ')[7])
-            else:
-                run, res = l.strip().split(';')
-                test_id, hue = run.split('-')
-                df = df.append({ 'bench': f"micro.{self.app}-{run}",
-                                 'dataset': 'none',
-                                 'arch': self.arch,
-                                 'threads': 1,
-                                 'cmdline': ' '.join(self.cmdline),
-                                 'unit': 'ms',
-                                 'value': float(res) }, ignore_index=True)
-
-        df['retval'] = retval
-        if len(df) == 0:
-            return None
-        return df
+    def parser(self):
+        return KeyValueParser(self, ';', 'ms', dataset='none', threads=1)
 
 
     def cleanup(self):
@@ -132,29 +95,54 @@ class Sqlite(Benchmark):
 
 class Cas(Benchmark):
 
+    # Datasets are either "<threads>-<locations>[-<ops per thread>]", or a
+    # list of key=value among locations and ops with the threads given by
+    # --num-threads, e.g. -n 8 -d locations=4,ops=1000000. A campaign
+    # matrix over both gives the threads x locations (x ops) grid.
+    dataset_re = re.compile(r"^(\d+)-(\d+)(?:-(\d+))?$")
+
     app = None
     arch = None
     binary_path = None
     dataset = None
-    configs = { "1-1": ["1", "1"],
-                "4-1": ["4", "1"],
-                "4-2": ["4", "2"],
-                "4-4": ["4", "4"],
-                "8-1": ["8", "1"],
-                "8-4": ["8", "4"],
-                "8-8": ["8", "8"],
-                "16-1": ["16", "1"],
-                "16-8": ["16", "8"],
-                "16-16": ["16", "16"]
-               }
+    locations = None
+    ops = None
 
     def __init__(self, args, config):
         super().__init__(args, config)
         self.app = args.bench[6:]
         self.binary_path = config.store['CAS_BENCH_BIN']
         self.binary_dir = os.path.dirname(self.binary_path)
-        self.dataset = args.dataset
-        self.threads = self.dataset.split('-')[0]
+
+        # Check dataset
+        if args.dataset is None:
+            logging.error("No dataset specified. Should be <threads>-<locations>[-<ops>] or locations=<n>[,ops=<n>]")
+            exit(1)
+        m = self.dataset_re.match(args.dataset)
+        if m is not None:
+            self.threads = int(m.group(1))
+            self.locations = int(m.group(2))
+            self.ops = int(m.group(3)) if m.group(3) is not None else None
+            self.dataset = f"{self.threads}-{self.locations}" + (f"-{self.ops}" if self.ops is not None else "")
+        else:
+            opts = {}
+            for opt in args.dataset.split(','):
+                key, _, val = opt.partition('=')
+                if key not in [ 'locations', 'ops' ] or not val.isdigit():
+                    logging.error("Dataset not supported. Should be <threads>-<locations>[-<ops>] or locations=<n>[,ops=<n>]")
+                    exit(1)
+                opts[key] = int(val)
+            if 'locations' not in opts:
+                logging.error("The number of shared locations must be given, e.g. locations=4")
+                exit(1)
+            self.locations = opts['locations']
+            self.ops = opts.get('ops')
+            # Threads are left out, so that runs with different --num-threads
+            # share the bench and dataset and form a scaling curve
+            self.dataset = f"locations={self.locations}" + (f",ops={self.ops}" if self.ops is not None else "")
+        if self.threads < 1 or self.locations < 1:
+            logging.error("micro.cas needs at least one thread and one location")
+            exit(1)
 
         # Get binary ISA
         if args.arch not in archs:
@@ -166,33 +154,13 @@ class Cas(Benchmark):
     def prepare(self):
         super().prepare()
 
-        try:
-            self.cmdline = [ self.binary_path ] + self.configs[self.dataset]
-        except KeyError:
-            logging.error(f"Dataset not supported. Should be among {self.configs}")
-            exit(1)
+        self.cmdline = [ self.binary_path, str(self.threads), str(self.locations) ]
+        if self.ops is not None:
+            self.cmdline.append(str(self.ops))
 
 
-    def format_output(self, stdout, stderr):
-        df = pd.DataFrame()
-        stdout.seek(0)
-        for l in stdout:
-            if "bench.py" in l:
-                retval = int(l.split(' ')[7])
-            else:
-                res = l.strip()
-                df = df.append({ 'bench': f"micro.{self.app}-{self.dataset}",
-                                 'dataset': self.dataset,
-                                 'arch': self.arch,
-                                 'threads': self.threads,
-                                 'cmdline': ' '.join(self.cmdline),
-                                 'unit': 's',
-                                 'value': float(res) }, ignore_index=True)
-
-        df['retval'] = retval
-        if len(df) == 0:
-            return None
-        return df
+    def parser(self):
+        return CasParser(self, 's', bench=f"micro.{self.app}-{self.dataset}")
 
 
     def cleanup(self):
@@ -210,6 +178,42 @@ class Cas(Benchmark):
         return ret
 
 
+class CasParser(ValueParser):
+
+    # The time of the run along with the point of the grid it belongs to.
+    # The requested ops per thread are passed to the binary as a third
+    # argument, which it may ignore: throughputs are only computed from
+    # the total number of operations the binary reports itself, as an
+    # "ops <n>" line.
+    ops_re = re.compile(r"^\s*ops\s*[:=]?\s*(\d+)\s*$")
+
+    ops = None
+
+    def feed(self, line):
+        m = self.ops_re.match(line)
+        if m is not None:
+            self.ops = int(m.group(1))
+            return
+        super().feed(line)
+
+    def record(self, **values):
+        bench = self.bench
+        return super().record(locations=bench.locations,
+                              ops_per_thread=bench.ops,
+                              contention=bench.threads / bench.locations,
+                              **values)
+
+    def records(self, run):
+        for r in self.rows:
+            r['ops'] = self.ops
+            r['throughput'] = None
+            r['throughput_per_thread'] = None
+            if self.ops is not None and r['value'] > 0:
+                r['throughput'] = self.ops / r['value']
+                r['throughput_per_thread'] = r['throughput'] / self.bench.threads
+        return super().records(run)
+
+
 
 class MicrobenchFactory():
 
@@ -1,18 +1,47 @@
 #!/usr/bin/env python3
 
 import logging
-import pandas as pd
 
 from applications.bench import Benchmark
+from applications.parsers import Parser
 
 archs = [ 'x86_64', 'aarch64' ]
 
+# openssl.<alg> -> arguments of openssl speed. Other names are passed as
+# is, or through -evp when they contain a '-' (ciphers such as aes-128-ocb)
+algorithms = {
+    # Digests
+    "md5": [ "md5" ],
+    "sha1": [ "sha1" ],
+    "sha256": [ "sha256" ],
+    "sha512": [ "sha512" ],
+    # Ciphers, AEADs only have an EVP implementation
+    "aes-128-cbc": [ "aes-128-cbc" ],
+    "aes-256-cbc": [ "aes-256-cbc" ],
+    "aes-128-gcm": [ "-evp", "aes-128-gcm" ],
+    "aes-256-gcm": [ "-evp", "aes-256-gcm" ],
+    "chacha20-poly1305": [ "-evp", "chacha20-poly1305" ],
+    # Public key algorithms
+    "rsa": [ "rsa" ],
+    "rsa2048": [ "rsa2048" ],
+    "rsa4096": [ "rsa4096" ],
+    "ecdsa": [ "ecdsa" ],
+    "ecdsap256": [ "ecdsap256" ],
+    "ecdh": [ "ecdh" ],
+    "ecdhp256": [ "ecdhp256" ],
+    "ed25519": [ "ed25519" ],
+    "ed448": [ "ed448" ]
+}
+
+# Options of openssl speed that can be set through the dataset, e.g. -d seconds=3,bytes=16384
+dataset_options = [ 'seconds', 'bytes' ]
+
 class Openssl(Benchmark):
 
     app = None
-    tmpdir = None
     arch = None
     binary_path = None
+    options = None
 
     def __init__(self, args, config):
         super().__init__(args, config)
@@ -25,15 +54,38 @@ class Openssl(Benchmark):
             exit(1)
         self.arch = args.arch
 
+        # Check dataset
+        self.options = {}
+        if args.dataset is not None and args.dataset != 'none':
+            for opt in args.dataset.split(','):
+                key, _, val = opt.partition('=')
+                if key not in dataset_options or not val.isdigit():
+                    logging.error(f"Dataset not supported by Openssl. Should be a list of key=<int> with keys among {dataset_options}")
+                    exit(1)
+                self.options[key] = val
+            self.dataset = args.dataset
+
 
     def prepare(self):
         super().prepare()
 
         self.cmdline = [ self.binary_path, "speed", "-mr" ]
+        # One process per thread, openssl speed sums their results
+        if self.threads > 1:
+            self.cmdline += [ "-multi", str(self.threads) ]
+        for key, val in self.options.items():
+            self.cmdline += [ f"-{key}", val ]
+
+        if self.app in algorithms:
+            self.cmdline += algorithms[self.app]
+        elif '-' in self.app:
+            self.cmdline += [ "-evp", self.app ]
+        else:
+            self.cmdline.append(self.app)
 
 
-    def format_output(self, stdout, stderr):
-        return None
+    def parser(self):
+        return SpeedParser(self)
 
 
     def cleanup(self):
@@ -44,138 +96,62 @@ class Openssl(Benchmark):
         ret = "<"
         ret += "name="+self.name
         ret += ", threads="+str(self.threads)
-        ret += ", dataset=none"
+        ret += f", dataset={self.dataset if self.dataset is not None else 'none'}"
         ret += ", arch="+self.arch
         ret += ", cmdline: " + str(self.cmdline)
         ret += ">"
         return ret
 
-def format_output_throughput(self, stdout, stderr):
-    df = pd.DataFrame()
-    stdout.seek(0)
-    for l in stdout:
-        if l.startswith("+H:"):
-            blksize_list = l.split(':')[1:]
-        elif l.startswith("+F:"):
-            throughput_list = l.split(':')[3:]
-        elif "bench.py" in l:
-            retval = int(l.split(' ')[7])
-    try:
-        if len(blksize_list) != len(throughput_list):
-            logging.error(f"Inconsistent output ({len(blksize_list)} block sizes and {len(throughput_list)} throughput values)")
-            return None
-        else:
-            for i, b in enumerate(blksize_list):
-                df = df.append({ 'bench': f"{self.name}-{b.strip()}",
-                                 'dataset': 'none',
-                                 'arch': self.arch,
-                                 'threads': 1,
-                                 'cmdline': ' '.join(self.cmdline),
-                                 'unit': 'B/s',
-                                 'retval': retval,
-                                 'value': float(throughput_list[i]) }, ignore_index=True)
-    except:
-        return None
-    return df
-
-class MD5(Openssl):
-
-    def __init__(self, args, config):
-        super().__init__(args, config)
-
-
-    def prepare(self):
-        super().prepare()
-        self.cmdline.append("md5")
-
-
-    def format_output(self, stdout, stderr):
-        return format_output_throughput(self, stdout, stderr)
-
-
-class SHA1(Openssl):
-
-    def __init__(self, args, config):
-        super().__init__(args, config)
-
-
-    def prepare(self):
-        super().prepare()
-        self.cmdline.append("sha1")
-
-
-    def format_output(self, stdout, stderr):
-        return format_output_throughput(self, stdout, stderr)
-
-
-class SHA256(Openssl):
-
-    def __init__(self, args, config):
-        super().__init__(args, config)
-
-
-    def prepare(self):
-        super().prepare()
-        self.cmdline.append("sha256")
-
-
-    def format_output(self, stdout, stderr):
-        return format_output_throughput(self, stdout, stderr)
-
 
-class RSA(Openssl):
-
-    def __init__(self, args, config):
-        super().__init__(args, config)
+class SpeedParser(Parser):
+
+    # Machine readable output of openssl speed -mr:
+    #   +H:<blksize>:...                      block sizes of the next +F lines
+    #   +F:<n>:<alg>:<B/s>:...                one throughput per block size
+    #   +F<k>:<n>:<bits>[:<name>]:<ops/s>:... public key operations
+    # Lines starting with "Got: " are the per-process results of -multi,
+    # the sums follow them without a +H line of their own.
+
+    # +F<k> -> algorithm family and operations, in the order of the values
+    families = {
+        "+F2": ("rsa", [ "sign", "verify", "encrypt", "decrypt" ]),
+        "+F3": ("dsa", [ "sign", "verify" ]),
+        "+F4": ("ecdsa", [ "sign", "verify" ]),
+        "+F5": ("ecdh", [ "op" ]),
+        "+F6": ("eddsa", [ "sign", "verify" ]),
+        "+F7": ("sm2", [ "sign", "verify" ]),
+        "+F8": ("ffdh", [ "op" ])
+    }
 
-
-    def prepare(self):
-        super().prepare()
-        self.cmdline.append("rsa")
-
-
-    def format_output(self, stdout, stderr):
-        df = pd.DataFrame()
-        stdout.seek(0)
-        for l in stdout:
-            if l.startswith("+F2:"):
-                arr = l.strip().split(':')
-                df = df.append({ 'bench': f"{self.name}{arr[2]}-sign",
-                                 'dataset': 'none',
-                                 'arch': self.arch,
-                                 'threads': 1,
-                                 'cmdline': ' '.join(self.cmdline),
-                                 'unit': 'sign/s',
-                                 'value': float(arr[3]) }, ignore_index=True)
-                df = df.append({ 'bench': f"{self.name}{arr[2]}-verify",
-                                 'dataset': 'none',
-                                 'arch': self.arch,
-                                 'threads': 1,
-                                 'cmdline': ' '.join(self.cmdline),
-                                 'unit': 'verify/s',
-                                 'value': float(arr[4]) }, ignore_index=True)
-            elif "bench.py" in l:
-                retval = int(l.split(' ')[7])
-
-        df['retval'] = retval
-        if len(df) == 0:
-            return None
-        return df
+    blksize_list = None
+
+    def feed(self, line):
+        if line.startswith("Got: +H:"):
+            line = line[5:].rsplit(' from ', 1)[0]
+        arr = line.strip().split(':')
+        if arr[0] == "+H":
+            self.blksize_list = arr[1:]
+        elif arr[0] == "+F":
+            if self.blksize_list is None or len(self.blksize_list) != len(arr[3:]):
+                logging.error(f"Inconsistent output ({self.blksize_list} block sizes for {line.strip()})")
+                return
+            for b, t in zip(self.blksize_list, arr[3:]):
+                self.record(bench=f"openssl.{arr[2].lower()}-{b.strip()}", unit='B/s', value=float(t))
+        elif arr[0] in self.families:
+            family, ops = self.families[arr[0]]
+            # Key sizes and curve names are printed before the rates,
+            # which are the only fields printed with a decimal point
+            ids = [ f for f in arr[2:] if '.' not in f ]
+            values = [ f for f in arr[2:] if '.' in f ]
+            # Extra values (e.g. the time per ECDH operation) are ignored
+            for op, v in zip(ops, values):
+                self.record(bench=f"openssl.{family}{'-'.join(ids)}-{op}", unit=f"{op}/s", value=float(v))
 
 
 class OpensslFactory():
 
-    apps = {
-        "openssl.md5": MD5,
-        "openssl.sha1": SHA1,
-        "openssl.sha256": SHA256,
-        "openssl.rsa": RSA,
-    }
-    
     def create(args, config):
-        try:
-            bench = OpensslFactory.apps[args.bench]
-        except:
-            logging.error("This benchmark is not supported in Openssl (yet?)")
+        if len(args.bench) <= 8:
+            logging.error(f"No algorithm given, use openssl.<alg> with <alg> among {list(algorithms.keys())} or any openssl speed algorithm")
             exit(1)
-        return bench(args, config)
+        return Openssl(args, config)
@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 
-import logging, tempfile, tarfile, os, shutil, tarfile
-import pandas as pd
+import logging, re, tempfile, tarfile, os, shutil, tarfile
 
 from applications.bench import Benchmark
+from applications.parsers import DurationParser
+from staging import input_cache, stage_tree
 
 datasets = [ 'test', 'simdev', 'simsmall', 'simmedium', 'simlarge', 'native' ]
 archs = {
@@ -19,11 +20,15 @@ class Parsec(Benchmark):
     arch = None
     parsec_dir = None
     bench_dir = None
+    input_cache = None
+    staging = None
 
     def __init__(self, args, config):
         super().__init__(args, config)
         self.app = args.bench[7:]
         self.parsec_dir = config.store["PARSEC_DIR"]
+        self.staging = args.staging
+        self.input_cache = input_cache(config, "parsec", self.staging)
 
         # Check dataset
         if args.dataset is None:
@@ -45,37 +50,43 @@ class Parsec(Benchmark):
     def prepare(self, no_input=False):
         self.tmpdir = tempfile.mkdtemp(prefix=f"parsec.{self.app}.")
 
-        # Extract input from tar in temp dir
-        if no_input is False:
-            tarpath = f"{self.parsec_dir}/{self.bench_dir}/{self.app}/inputs/input_{self.dataset}.tar"
-            logging.debug(f"Extracting input {tarpath} to {self.tmpdir}")
-            tar = tarfile.open(tarpath)
-            tar.extractall(path=self.tmpdir)
-            tar.close()
-
-
-    def format_output(self, stdout, stderr):
-        df = pd.DataFrame()
-        stdout.seek(0)
-        for l in stdout:
-            if "bench.py" in l:
-                duration = float(l.split(' ')[2])
-                retval = int(l.split(' ')[7])
-                df = df.append({ 'bench': f"parsec.{self.app}",
-                                 'dataset': self.dataset,
-                                 'arch': self.arch,
-                                 'threads': int(self.threads),
-                                 'cmdline': ' '.join(self.cmdline),
-                                 'unit': 'seconds',
-                                 'retval': retval,
-                                 'value': duration }, ignore_index=True)
-        if len(df) == 0:
-            return None
-        return df
+        if no_input is True:
+            return
+
+        tarpath = f"{self.parsec_dir}/{self.bench_dir}/{self.app}/inputs/input_{self.dataset}.tar"
+        if self.input_cache is None:
+            self.extract(tarpath, self.tmpdir)
+            return
+
+        # Extract the input once in the cache, then stage it in the temp dir
+        key = f"{self.input_cache.hash_file(tarpath)}-{self.dataset}"
+        cached = self.input_cache.get(key, lambda path: self.extract(tarpath, path))
+        stage_tree(cached, self.tmpdir, self.staging)
+
+
+    def parser(self):
+        return RoiParser(self)
+
+
+    def input_files(self):
+        return [ self.tmpdir ]
+
+
+    def scratch_dirs(self):
+        return [ self.tmpdir ]
+
+
+    def extract(self, tarpath, path):
+        logging.debug(f"Extracting input {tarpath} to {path}")
+        tar = tarfile.open(tarpath)
+        tar.extractall(path=path)
+        tar.close()
 
 
     def cleanup(self):
         shutil.rmtree(self.tmpdir)
+        if self.input_cache is not None:
+            self.input_cache.release()
 
     def __str__(self):
         ret = "<"
@@ -87,6 +98,28 @@ class Parsec(Benchmark):
         ret += ">"
         return ret
 
+class RoiParser(DurationParser):
+
+    # Wall-clock time of the run, along with the time spent in the region
+    # of interest when the binary was built with the PARSEC hooks:
+    #   "[HOOKS] Total time spent in ROI: 1.234s"
+
+    roi_re = re.compile(r"^\[HOOKS\] Total time spent in ROI: ([\d.]+)s")
+
+    roi_time = None
+
+    def feed(self, line):
+        m = self.roi_re.match(line)
+        if m is not None:
+            self.roi_time = float(m.group(1))
+
+    def records(self, run):
+        if self.roi_time is None:
+            logging.debug("No ROI time in the output, the binary was probably built without hooks")
+        self.common['roi_time'] = self.roi_time
+        return super().records(run)
+
+
 class Blackscholes(Parsec):
 
     inputs = {
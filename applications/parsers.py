@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+
+import logging
+
+class Parser():
+
+    bench = None
+    rows = None
+    common = None
+
+    def __init__(self, bench, /, **fields):
+        self.bench = bench
+        self.rows = []
+
+        # Columns shared by every row, fields override the benchmark's values
+        self.common = { 'bench': bench.name,
+                        'dataset': bench.dataset if bench.dataset is not None else 'none',
+                        'arch': bench.arch,
+                        'threads': int(bench.threads),
+                        'cmdline': ' '.join(bench.cmdline) }
+        self.common.update(fields)
+
+    def feed(self, line):
+        # Called for every line of stdout, as soon as the benchmark prints it
+        pass
+
+    def record(self, **values):
+        rec = { **self.common, **values }
+        self.rows.append(rec)
+        return rec
+
+    def records(self, run):
+        # Called once the benchmark exited
+        for r in self.rows:
+            r['retval'] = run.retval
+        return self.rows
+
+
+class DurationParser(Parser):
+
+    # One row per run: the wall-clock time measured by the harness. Its
+    # kind tells it apart from timings reported by the benchmark itself.
+
+    def records(self, run):
+        self.record(unit='seconds', kind='wallclock', value=run.duration)
+        return super().records(run)
+
+
+class KeyValueParser(Parser):
+
+    # One row per "<test><sep><value>" line, named after the test
+
+    sep = None
+    unit = None
+
+    def __init__(self, bench, sep, unit, /, **fields):
+        super().__init__(bench, **fields)
+        self.sep = sep
+        self.unit = unit
+
+    def feed(self, line):
+        try:
+            key, value = line.strip().split(self.sep)
+            value = float(value)
+        except ValueError:
+            if line.isspace() or line == "":
+                return
+            logging.warning(f"Ignoring malformed output line: {line.strip()}")
+            return
+        self.record(bench=f"{self.bench.name}-{key}", unit=self.unit, value=value)
+
+
+class ValueParser(Parser):
+
+    # One row per line holding a single value
+
+    unit = None
+
+    def __init__(self, bench, unit, /, **fields):
+        super().__init__(bench, **fields)
+        self.unit = unit
+
+    def feed(self, line):
+        if line.isspace() or line == "":
+            return
+        try:
+            value = float(line.strip())
+        except ValueError:
+            logging.warning(f"Ignoring malformed output line: {line.strip()}")
+            return
+        self.record(unit=self.unit, value=value)
@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 
 import logging, os, shutil, tempfile
-import pandas as pd
 
 from applications.bench import Benchmark
+from applications.generators import generate, parse_dataset, version
+from staging import input_cache, stage_file
 
 datasets = [ 'small', 'med', 'large' ]
 archs = {
@@ -17,18 +18,29 @@ class Phoenix(Benchmark):
     app = None
     arch = None
     phoenix_dir = None
+    input_path = None
+    input_cache = None
+    staging = None
+    # Generator of the input file, for datasets such as 2GB or 2GB,seed=42
+    format = None
+    size = None
+    seed = None
 
     def __init__(self, args, config):
         super().__init__(args, config)
         self.app = args.bench
         self.phoenix_dir = config.store["PHOENIX_DIR"]
+        self.staging = args.staging
+        self.input_cache = input_cache(config, "phoenix", self.staging)
 
         # Check dataset
         if args.dataset is None:
             logging.warning("No dataset specified. Falling back to 'test'.")
             args.dataset = "small"
-        if args.dataset not in datasets:
-            logging.error("Dataset not supported by Phoenix. Should be among "+str(datasets))
+        if self.format is not None and parse_dataset(args.dataset) is not None:
+            self.size, self.seed = parse_dataset(args.dataset)
+        if args.dataset not in datasets and self.size is None:
+            logging.error("Dataset not supported by Phoenix. Should be among "+str(datasets)+(", or a size such as 2GB or 2GB,seed=42" if self.format is not None else ""))
             exit(1)
         else:
             self.dataset = args.dataset
@@ -47,31 +59,47 @@ class Phoenix(Benchmark):
     def prepare(self, no_input=False, input_path=None):
         self.tmpdir = tempfile.mkdtemp(prefix=f"{self.app}.")
 
-        if no_input is False:
-            shutil.copy(input_path, f"{self.tmpdir}/")
-
-
-    def format_output(self, stdout, stderr):
-        df = pd.DataFrame()
-        stdout.seek(0)
-        for l in stdout:
-            if "bench.py" in l:
-                duration = float(l.split(' ')[2])
-                retval = int(l.split(' ')[7])
-                df = df.append({ 'bench': self.app,
-                                 'dataset': self.dataset,
-                                 'arch': self.arch,
-                                 'threads': int(self.threads),
-                                 'cmdline': ' '.join(self.cmdline),
-                                 'unit': 'seconds',
-                                 'retval': retval,
-                                 'value': duration }, ignore_index=True)
-        if len(df) == 0:
+        if no_input is True:
+            return
+
+        if self.size is not None:
+            # Generated inputs are cached by format, size and seed
+            name = f"{self.format}-{self.size}-{self.seed}.{'bmp' if self.format == 'bmp' else 'txt'}"
+            fill = lambda path: generate(self.format, self.size, self.seed, f"{path}/{name}")
+            key = f"gen-{self.format}-{self.size}-{self.seed}-v{version}"
+        else:
+            name = os.path.basename(input_path)
+            fill = lambda path: shutil.copy(input_path, f"{path}/")
+            key = self.input_cache.hash_file(input_path) if self.input_cache is not None else None
+
+        if self.input_cache is None:
+            fill(self.tmpdir)
+            self.input_path = f"{self.tmpdir}/{name}"
+            return
+
+        # Copy the input once in the cache, then either read it in place or
+        # stage it in the temp dir without copying it again
+        cached = self.input_cache.get(key, fill)
+        if self.staging in [ 'bind', 'tmpfs' ]:
+            self.input_path = f"{cached}/{name}"
+        else:
+            self.input_path = f"{self.tmpdir}/{name}"
+            stage_file(f"{cached}/{name}", self.input_path, self.staging)
+
+
+    def dataset_file(self, directory):
+        # Shipped input file of the dataset, None for generated ones
+        if self.size is not None:
             return None
-        return df
+        return f"{directory}/{self.inputs[self.dataset]}"
+
+    def input_files(self):
+        return [ self.input_path ] if self.input_path is not None else []
 
     def cleanup(self):
         shutil.rmtree(self.tmpdir)
+        if self.input_cache is not None:
+            self.input_cache.release()
 
     def __str__(self):
         ret = "<"
@@ -86,6 +114,8 @@ class Phoenix(Benchmark):
 
 class Histogram(Phoenix):
 
+    format = "bmp"
+
     inputs = {
         'small': 'small.bmp',
         'med':     'med.bmp',
@@ -96,19 +126,19 @@ class Histogram(Phoenix):
         super().__init__(args, config)
 
         # Check dataset
-        if args.dataset not in self.inputs:
-            logging.error(f"Dataset not supported by {self.app}. Should be among {self.inputs.keys()}")
+        if args.dataset not in self.inputs and self.size is None:
+            logging.error(f"Dataset not supported by {self.app}. Should be among {list(self.inputs.keys())}, or a size such as 2GB")
             exit(1)
         else:
             self.dataset = args.dataset
 
 
     def prepare(self):
-        super().prepare(input_path=f"{self.phoenix_dir}/phoenix-2.0/tests/histogram/histogram_datafiles/{self.inputs[self.dataset]}")
+        super().prepare(input_path=self.dataset_file(f"{self.phoenix_dir}/phoenix-2.0/tests/histogram/histogram_datafiles"))
 
         # Build cmdline
         self.cmdline = [ f"{self.phoenix_dir}/phoenix-2.0/tests/histogram/histogram",
-                         f"{self.tmpdir}/{self.inputs[self.dataset]}" ]
+                         self.input_path ]
 
 
 class Kmeans(Phoenix):
@@ -127,6 +157,8 @@ class Kmeans(Phoenix):
 
 class LinearRegression(Phoenix):
 
+    format = "keyfile"
+
     inputs = {
         'small': 'key_file_50MB.txt',
         'med':   'key_file_100MB.txt',
@@ -137,18 +169,18 @@ class LinearRegression(Phoenix):
         super().__init__(args, config)
 
         # Check dataset
-        if args.dataset not in self.inputs:
-            logging.error(f"Dataset not supported by {self.app}. Should be among {self.inputs.keys()}")
+        if args.dataset not in self.inputs and self.size is None:
+            logging.error(f"Dataset not supported by {self.app}. Should be among {list(self.inputs.keys())}, or a size such as 2GB")
             exit(1)
         else:
             self.dataset = args.dataset
 
     def prepare(self):
-        super().prepare(input_path=f"{self.phoenix_dir}/phoenix-2.0/tests/linear_regression/linear_regression_datafiles/{self.inputs[self.dataset]}")
+        super().prepare(input_path=self.dataset_file(f"{self.phoenix_dir}/phoenix-2.0/tests/linear_regression/linear_regression_datafiles"))
 
         # Build cmdline
         self.cmdline = [ f"{self.phoenix_dir}/phoenix-2.0/tests/linear_regression/linear_regression",
-                         f"{self.tmpdir}/{self.inputs[self.dataset]}" ]
+                         self.input_path ]
 
 
 class MatrixMultiply(Phoenix):
@@ -181,6 +213,8 @@ class Pca(Phoenix):
 
 class StringMatch(Phoenix):
 
+    format = "keyfile"
+
     inputs = {
         'small': 'key_file_50MB.txt',
         'med':   'key_file_100MB.txt',
@@ -191,23 +225,25 @@ class StringMatch(Phoenix):
         super().__init__(args, config)
 
         # Check dataset
-        if args.dataset not in self.inputs:
-            logging.error(f"Dataset not supported by {self.app}. Should be among {self.inputs.keys()}")
+        if args.dataset not in self.inputs and self.size is None:
+            logging.error(f"Dataset not supported by {self.app}. Should be among {list(self.inputs.keys())}, or a size such as 2GB")
             exit(1)
         else:
             self.dataset = args.dataset
 
 
     def prepare(self):
-        super().prepare(input_path=f"{self.phoenix_dir}/phoenix-2.0/tests/linear_regression/linear_regression_datafiles/{self.inputs[self.dataset]}")
+        super().prepare(input_path=self.dataset_file(f"{self.phoenix_dir}/phoenix-2.0/tests/linear_regression/linear_regression_datafiles"))
 
         # Build cmdline
         self.cmdline = [ f"{self.phoenix_dir}/phoenix-2.0/tests/string_match/string_match",
-                         f"{self.tmpdir}/{self.inputs[self.dataset]}" ]
+                         self.input_path ]
 
 
 class WordCount(Phoenix):
 
+    format = "words"
+
     inputs = {
         'small': 'word_10MB.txt',
         'med':   'word_50MB.txt',
@@ -218,19 +254,19 @@ class WordCount(Phoenix):
         super().__init__(args, config)
 
         # Check dataset
-        if args.dataset not in self.inputs:
-            logging.error(f"Dataset not supported by {self.app}. Should be among {self.inputs.keys()}")
+        if args.dataset not in self.inputs and self.size is None:
+            logging.error(f"Dataset not supported by {self.app}. Should be among {list(self.inputs.keys())}, or a size such as 2GB")
             exit(1)
         else:
             self.dataset = args.dataset
 
 
     def prepare(self):
-        super().prepare(input_path=f"{self.phoenix_dir}/phoenix-2.0/tests/word_count/word_count_datafiles/{self.inputs[self.dataset]}")
+        super().prepare(input_path=self.dataset_file(f"{self.phoenix_dir}/phoenix-2.0/tests/word_count/word_count_datafiles"))
 
         # Build cmdline
         self.cmdline = [ f"{self.phoenix_dir}/phoenix-2.0/tests/word_count/word_count",
-                         f"{self.tmpdir}/{self.inputs[self.dataset]}" ]
+                         self.input_path ]
 
 
 class PhoenixFactory():
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+
+import hashlib, logging, os, shutil, tempfile
+
+# Default cache location, on the same filesystem as the benchmark tmpdirs
+# so that cached files can be hardlinked or reflinked into them
+default_dir = f"{tempfile.gettempdir()}/a2a-benchmarks-cache"
+default_size = 64 * 1024 ** 3
+
+def dir_size(path):
+    size = 0
+    for root, dirs, files in os.walk(path):
+        for f in files:
+            try:
+                size += os.lstat(f"{root}/{f}").st_size
+            except FileNotFoundError:
+                pass
+    return size
+
+def parse_size(s):
+    units = { 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4 }
+    s = s.strip().upper().rstrip('B')
+    if s[-1] in units:
+        return int(float(s[:-1]) * units[s[-1]])
+    return int(s)
+
+
+class Cache():
+
+    root = None
+    max_size = None
+    pins = None
+
+    def __init__(self, config, name, root=None, max_size=None):
+        if root is None:
+            root = config.store.get('CACHE_DIR', default_dir)
+        if max_size is None:
+            max_size = config.store.get('CACHE_SIZE', str(default_size))
+        self.root = f"{root}/{name}"
+        self.max_size = parse_size(max_size)
+        self.pins = []
+        os.makedirs(f"{self.root}/.hashes", exist_ok=True)
+
+    def hash_file(self, path):
+        # Hashing a multi-GB input is not free: remember the digest of a
+        # file as long as its size and modification time do not change
+        st = os.stat(path)
+        stamp = hashlib.sha256(f"{os.path.abspath(path)}:{st.st_size}:{st.st_mtime_ns}".encode()).hexdigest()
+        try:
+            with open(f"{self.root}/.hashes/{stamp}", 'r') as fp:
+                return fp.read().strip()
+        except FileNotFoundError:
+            pass
+
+        logging.debug(f"Hashing {path}")
+        h = hashlib.sha256()
+        with open(path, 'rb') as fp:
+            for block in iter(lambda: fp.read(1024 * 1024), b''):
+                h.update(block)
+        digest = h.hexdigest()
+        with open(f"{self.root}/.hashes/{stamp}", 'w') as fp:
+            fp.write(digest)
+        return digest
+
+    def lookup(self, key):
+        path = f"{self.root}/{key}"
+        if not os.path.isdir(path):
+            return None
+
+        # Mark the entry as recently used
+        os.utime(path)
+        return path
+
+    def insert(self, key, fill):
+        # Fill a private directory, then publish it atomically so that
+        # concurrent users never see a half-filled entry
+        tmp = tempfile.mkdtemp(dir=self.root, prefix=f".{key}.")
+        try:
+            fill(tmp)
+            size = dir_size(tmp)
+
+            # Cached files are read-only, benchmarks must never modify them
+            for root, dirs, files in os.walk(tmp):
+                for f in files:
+                    if not os.path.islink(f"{root}/{f}"):
+                        mode = os.stat(f"{root}/{f}").st_mode
+                        os.chmod(f"{root}/{f}", 0o444 | (mode & 0o111))
+
+            with open(f"{self.root}/.{key}.size", 'w') as fp:
+                fp.write(str(size))
+            os.rename(tmp, f"{self.root}/{key}")
+        except OSError:
+            # Somebody else published the same entry in the meantime
+            shutil.rmtree(tmp, ignore_errors=True)
+            if not os.path.isdir(f"{self.root}/{key}"):
+                raise
+        except:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+        self.evict()
+        return f"{self.root}/{key}"
+
+    def get(self, key, fill):
+        # The entry is pinned before it is looked up, so that it cannot be
+        # evicted while runs use it, until release() is called
+        self.pin(key)
+        path = self.lookup(key)
+        if path is not None:
+            logging.debug(f"Cache hit: {path}")
+            return path
+        logging.debug(f"Cache miss: {self.root}/{key}")
+        return self.insert(key, fill)
+
+    def pin(self, key):
+        # One file per user of the entry, named after the pid of its process
+        os.makedirs(f"{self.root}/.{key}.pins", exist_ok=True)
+        fd, path = tempfile.mkstemp(dir=f"{self.root}/.{key}.pins", prefix=f"{os.getpid()}.")
+        os.close(fd)
+        self.pins.append(path)
+
+    def release(self):
+        # Unpin every entry returned by get()
+        for path in self.pins:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        self.pins = []
+
+    def pinned(self, key):
+        # Pins of processes that died without releasing them are removed
+        try:
+            pins = os.listdir(f"{self.root}/.{key}.pins")
+        except FileNotFoundError:
+            return False
+        for p in pins:
+            try:
+                os.kill(int(p.split('.')[0]), 0)
+                return True
+            except PermissionError:
+                return True
+            except (ProcessLookupError, ValueError):
+                try:
+                    os.unlink(f"{self.root}/.{key}.pins/{p}")
+                except FileNotFoundError:
+                    pass
+        return False
+
+    def entries(self):
+        entries = []
+        for key in os.listdir(self.root):
+            path = f"{self.root}/{key}"
+            if key.startswith('.') or not os.path.isdir(path):
+                continue
+            try:
+                with open(f"{self.root}/.{key}.size", 'r') as fp:
+                    size = int(fp.read())
+            except (FileNotFoundError, ValueError):
+                size = dir_size(path)
+            entries.append((os.stat(path).st_mtime, key, size))
+        return entries
+
+    def evict(self):
+        # Remove least recently used entries until the cache fits. Pinned
+        # entries are read by runs, possibly in place: they are kept even
+        # if the cache stays over its size.
+        entries = sorted(self.entries())
+        total = sum([ e[2] for e in entries ])
+        for mtime, key, size in entries:
+            if total <= self.max_size:
+                break
+            if self.pinned(key):
+                continue
+            logging.info(f"Evicting {self.root}/{key} from cache ({size} bytes)")
+            shutil.rmtree(f"{self.root}/{key}", ignore_errors=True)
+            shutil.rmtree(f"{self.root}/.{key}.pins", ignore_errors=True)
+            try:
+                os.unlink(f"{self.root}/.{key}.size")
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def __str__(self):
+        return f"<root={self.root}, max_size={self.max_size}>"
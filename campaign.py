@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+
+import argparse, itertools, json, logging, os, random
+
+import runner
+from config import Config
+from executor import ParallelExecutor
+from jobqueue import JobQueue
+from results import StoreFactory
+from applications.factory import BenchmarkFactory
+from runtimes.factory import RuntimeFactory
+
+# A campaign spec is a JSON file such as:
+#
+# {
+#     "output": "results.db",
+#     "num-runs": 10,
+#     "matrix": [
+#         { "bench": [ "parsec.blackscholes", "parsec.canneal" ],
+#           "dataset": "simsmall",
+#           "num-threads": [ 1, 2, 4 ],
+#           "runtime": [ "native", "qemu" ] },
+#         { "bench": "openssl.md5", "num-threads": 1,
+#           "runtime": "qemu", "tag": [ "master", "no-fences" ] }
+#     ]
+# }
+#
+# Top-level keys are bench.py long options shared by every point. Each
+# entry of "matrix" is expanded as the cartesian product of its values.
+#
+# A list is always an axis. Options that can be repeated, such as --wrap,
+# take a nested list to be given several values in the same point:
+#
+#     "wrap": [ "perf", "strace" ]          two points, one per tool
+#     "wrap": [ [ "perf", "strace" ] ]      one point, --wrap perf --wrap strace
+#     "wrap": [ [ "perf" ], [ "perf", "strace" ] ]   two points
+#
+# Variants are not expanded, a list there is always a repeated option.
+#
+# An optional "variants" list turns every point into an interleaved A/B
+# comparison, e.g. of two QEMU builds:
+#
+#     "variants": [
+#         { "tag": "master", "config": { "QEMU_PATH": "/opt/qemu-master" } },
+#         { "tag": "no-fences", "run-opt": "-accel tcg,thread=multi",
+#           "config": { "QEMU_PATH": "/opt/qemu-no-fences" } }
+#     ]
+#
+# Variants may only change runtime options, and "config" overrides keys of
+# the configuration file. The runs of all the variants of a point are
+# executed in blocks of one run per variant, in a random order.
+
+
+def to_argv(point):
+    argv = []
+    for key, val in point.items():
+        if val is None or val is False:
+            continue
+        # Options that can be repeated, e.g. --wrap
+        for v in (val if isinstance(val, list) else [ val ]):
+            argv.append(f"--{key}")
+            if v is not True:
+                argv.append(str(v))
+    return argv
+
+
+def args_argv(args):
+    return to_argv({ k.replace('_', '-'): v for k, v in vars(args).items() if k != 'verbose' })
+
+
+def expand(spec):
+    common = { k: v for k, v in spec.items() if k not in [ 'matrix', 'variants' ] }
+    matrix = spec.get('matrix', [ {} ])
+    if isinstance(matrix, dict):
+        matrix = [ matrix ]
+
+    points = []
+    for entry in matrix:
+        entry = { **common, **entry }
+        axes = [ v if isinstance(v, list) else [ v ] for v in entry.values() ]
+        for values in itertools.product(*axes):
+            points.append(dict(zip(entry.keys(), values)))
+    return points
+
+
+def with_variants(point, variants):
+    # One (point, config overrides) pair per variant
+    if variants is None:
+        return [ (point, {}) ]
+    ret = []
+    for v in variants:
+        opts = { k: val for k, val in v.items() if k != 'config' }
+        for k in opts:
+            if k.replace('-', '_') not in runner.runtime_options:
+                logging.error(f"Variants can only change runtime options, not {k}")
+                exit(1)
+        ret.append(({ **point, **opts }, v.get('config', {})))
+    return ret
+
+
+def bench_key(args):
+    return tuple(sorted([ (k, str(v)) for k, v in vars(args).items() if k not in runner.runtime_options ]))
+
+
+######################################
+
+if __name__ == "__main__":
+    # Parse the command line arguments and options
+    parser = argparse.ArgumentParser(description="Run a campaign of benchmarks described by a spec file")
+    parser.add_argument('spec',
+                        help='JSON campaign spec, see the top of campaign.py. Lists are axes, repeated options such as wrap take a nested list')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Only print the expanded points')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Number of runs executed in parallel, each on its own physical cores (default: 1)')
+    parser.add_argument('--cores-per-job', type=int, default=None,
+                        help='Physical cores given to each parallel run (default: largest number of threads in the campaign)')
+    parser.add_argument('--queue', default=None,
+                        help='Submit the points to a job queue (SQLite file) executed by worker.py, instead of running them')
+    parser.add_argument('--priority', type=int, default=0,
+                        help='Priority of the submitted jobs, higher first (default: 0)')
+    parser.add_argument('--max-attempts', type=int, default=3,
+                        help='Number of times a submitted job is tried before it is marked failed (default: 3)')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Seed of the random order of interleaved variants (default: random)')
+    parser.add_argument('-v', '--verbose', action='count', default=0,
+                        help='Set the verbosity level')
+    args = parser.parse_args()
+
+    # Setup logging
+    runner.setup_logging(args.verbose)
+
+    # Expand the matrix and validate every point with the bench.py parser.
+    # A point is a list of (args, config overrides) variants.
+    with open(args.spec, 'r') as fp:
+        spec = json.load(fp)
+    bench_parser = runner.build_parser()
+    points = []
+    for p in expand(spec):
+        variants = []
+        for v, overrides in with_variants(p, spec.get('variants')):
+            point_args = bench_parser.parse_args(to_argv(v))
+            point_args.output = os.path.abspath(point_args.output)
+            point_args.config_file = os.path.abspath(point_args.config_file)
+            point_args.verbose = args.verbose
+            variants.append((point_args, overrides))
+        points.append(variants)
+    logging.info(f"Campaign has {len(points)} points")
+
+    # Group points sharing the same benchmark inputs, keeping the spec order
+    groups = {}
+    for p in points:
+        groups.setdefault(bench_key(p[0][0]), []).append(p)
+
+    if args.dry_run:
+        for group in groups.values():
+            for p in group:
+                for v, overrides in p:
+                    line = ' '.join(args_argv(v))
+                    print(line + ''.join([ f" # {k}={val}" for k, val in overrides.items() ]))
+        exit(0)
+
+    interleaved = 'variants' in spec
+    seed = args.seed if args.seed is not None else random.randrange(2**32)
+    rng = random.Random(seed)
+    if interleaved:
+        logging.info(f"Interleaving {len(spec['variants'])} variants with seed {seed}")
+
+    # Jobs are points, each with its own seed to interleave its variants
+    if args.queue is not None:
+        queue = JobQueue(args.queue)
+        for group in groups.values():
+            for p in group:
+                queue.submit({ 'variants': [ (args_argv(v), overrides) for v, overrides in p ],
+                               'interleaved': interleaved, 'seed': rng.randrange(2**32) },
+                             priority=args.priority, max_attempts=args.max_attempts)
+        logging.info(f"Submitted {len(points)} jobs to {args.queue}: {queue.status()}")
+        queue.close()
+        exit(0)
+
+    executor = None
+    if args.jobs > 1 and interleaved:
+        logging.warning("Interleaved variants are run one at a time, ignoring --jobs")
+    elif args.jobs > 1:
+        cores_per_job = args.cores_per_job
+        if cores_per_job is None:
+            cores_per_job = max([ p[0][0].num_threads for p in points ])
+        executor = ParallelExecutor(args.jobs, cores_per_job)
+
+    configs = {}
+    stores = {}
+    prepared = []
+    for i, group in enumerate(groups.values()):
+        first = group[0][0][0]
+        logging.info(f"Group {i + 1}/{len(groups)}: {first.bench} ({len(group)} points)")
+
+        if first.config_file not in configs:
+            configs[first.config_file] = Config(first.config_file)
+        config = configs[first.config_file]
+
+        # Prepare the benchmark once for the whole group
+        try:
+            bench = BenchmarkFactory.create(first, config)
+            if bench is None:
+                logging.error(f"Unsupported benchmark {first.bench}, skipping")
+                continue
+            bench.prepare()
+        except SystemExit:
+            logging.error(f"Failed to prepare {first.bench}, skipping {len(group)} points")
+            continue
+        # Runtimes are cleaned up along with the benchmark they ran
+        runtimes = []
+        prepared.append((bench, runtimes))
+        logging.info(f"Benchmark is ready: {bench}")
+
+        try:
+            for p in group:
+                variants = []
+                for v, overrides in p:
+                    try:
+                        runtime = RuntimeFactory.create(v, config.derive(overrides))
+                    except SystemExit:
+                        logging.error(f"Failed to create runtime {v.runtime}, skipping")
+                        continue
+                    logging.info(f"Runtime is ready: {runtime}")
+                    runtimes.append(runtime)
+
+                    if v.output not in stores:
+                        stores[v.output] = StoreFactory.create(v.output)
+                    variants.append((v, runtime, stores[v.output]))
+
+                if interleaved:
+                    if len(variants) != 0:
+                        runner.interleave(variants, bench, rng)
+                    continue
+                for v, runtime, store in variants:
+                    if executor is None:
+                        runner.run(v, bench, runtime, store)
+                    else:
+                        executor.submit(v, bench, runtime, store)
+        finally:
+            # In parallel mode, benchmarks stay prepared until every run is done
+            if executor is None:
+                runner.cleanup(*prepared.pop())
+
+    try:
+        if executor is not None:
+            executor.run()
+    finally:
+        for bench, runtimes in reversed(prepared):
+            runner.cleanup(bench, runtimes)
+        for store in stores.values():
+            store.close()
@@ -1,22 +1,32 @@
 #!/usr/bin/env python3
 
+import copy
+
 class Config():
 
     store = {}
 
     def __init__(self, path):
+        self.store = {}
         with open(path, 'r') as fp:
             lino = 1
             for l in fp:
                 if l.startswith("#") or l.isspace():
                     continue
+                # Values can hold '=' themselves, e.g. QEMU plugin arguments
                 try:
-                    [key, val] = l.split('=')
+                    [key, val] = l.split('=', 1)
                 except:
                     print("[ERROR] Configuration file is not correctly formed at "+path+":"+str(lino))
                     exit(1)
                 self.store[key] = val.strip()
                 lino += 1
 
+    def derive(self, values):
+        # Copy of the configuration with some keys overridden
+        ret = copy.copy(self)
+        ret.store = { **self.store, **values }
+        return ret
+
     def __str__(self):
         return self.store.__str__()
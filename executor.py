@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+import logging, multiprocessing, os, shutil, tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import runner
+from staging import stage_tree
+from topology import Topology
+
+def init_worker(slots):
+    # Each worker takes one slot for its whole lifetime. The benchmark
+    # processes it spawns inherit its affinity mask, which runs record in
+    # their cpus column.
+    os.sched_setaffinity(0, slots.get())
+
+def private_scratch(bench, cwd):
+    # Concurrent runs of the same prepared benchmark would write to the
+    # same files. Each run gets its own copy of the directories the
+    # benchmark writes to, and paths into them are rewritten. bench is the
+    # copy sent to this worker, so it can be changed in place.
+    dirs = {}
+    for d in bench.scratch_dirs():
+        dirs[d] = tempfile.mkdtemp(prefix=f"{os.path.basename(d)}.", dir=os.path.dirname(d))
+        stage_tree(d, dirs[d])
+
+    def rewrite(path):
+        for d, private in dirs.items():
+            if path == d or path.startswith(d + '/'):
+                return private + path[len(d):]
+        return path
+
+    bench.cmdline = [ rewrite(a) for a in bench.cmdline ]
+    bench.env = { k: rewrite(v) for k, v in bench.env.items() }
+    return list(dirs.values()), rewrite(cwd) if cwd is not None else None
+
+def run_job(args, bench, runtime, i, cwd):
+    dirs, cwd = private_scratch(bench, cwd)
+    try:
+        records, tables, out, err = runner.execute(args, bench, runtime, i, cwd=cwd)
+    finally:
+        for d in dirs:
+            shutil.rmtree(d, ignore_errors=True)
+    return records, tables, out, err
+
+
+class ParallelExecutor():
+
+    slots = None
+    jobs = None
+
+    def __init__(self, jobs, cores_per_job):
+        topology = Topology()
+        logging.info(f"Topology: {topology}")
+        self.slots = topology.slots(jobs, cores_per_job)
+        if len(self.slots) == 0:
+            logging.error(f"Not enough cores to run jobs with {cores_per_job} cores each")
+            exit(1)
+        self.jobs = []
+        logging.info(f"CPU slots: {self.slots}")
+
+    def submit(self, args, bench, runtime, store):
+        # Runs are queued until run() is called. The working directory is
+        # captured now since some benchmarks chdir() in prepare().
+        cwd = os.getcwd()
+        runtime.prepare(bench)
+        if args.adaptive:
+            logging.warning(f"Adaptive mode is not available with parallel runs, performing {args.num_runs} runs")
+        for i in range(1, args.warmup + args.num_runs + 1):
+            self.jobs.append((args, bench, runtime, i, cwd, store))
+
+    def run(self):
+        queue = multiprocessing.Queue()
+        for s in self.slots:
+            queue.put(s)
+
+        # Warmup runs complete before any measured run starts, so that
+        # they really are the first runs and never overlap measured ones
+        phases = [ [ job for job in self.jobs if job[3] <= job[0].warmup ],
+                   [ job for job in self.jobs if job[3] > job[0].warmup ] ]
+        logging.info(f"Executing {len(self.jobs)} runs on {len(self.slots)} workers...")
+        with ProcessPoolExecutor(max_workers=len(self.slots),
+                                 initializer=init_worker, initargs=(queue,)) as pool:
+            for jobs in phases:
+                futures = { pool.submit(run_job, *job[:5]): job for job in jobs }
+                for f in as_completed(futures):
+                    store = futures[f][5]
+                    records, tables, out, err = f.result()
+                    if records is not None:
+                        store.append(records, **tables)
+                    runner.dump(out, err)
+        logging.info(f"Executing {len(self.jobs)} runs on {len(self.slots)} workers... done")
+        self.jobs = []
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+import json, os, socket, sqlite3, time
+
+# Job states
+states = [ 'queued', 'running', 'done', 'failed' ]
+
+class JobQueue():
+
+    path = None
+    conn = None
+
+    def __init__(self, path):
+        self.path = path
+
+        # Autocommit mode: transactions are handled explicitly, with BEGIN
+        # IMMEDIATE so that two workers never claim the same job. WAL mode
+        # restricts the queue to the processes of a single host.
+        self.conn = sqlite3.connect(path, timeout=600, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS jobs ("
+                          "job_id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                          "priority INTEGER, point TEXT, state TEXT, "
+                          "attempts INTEGER, max_attempts INTEGER, "
+                          "worker TEXT, lease_until REAL, "
+                          "submitted REAL, started REAL, finished REAL, error TEXT)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_queued ON jobs (state, priority, job_id)")
+
+    def transaction(self, fn):
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            ret = fn()
+            self.conn.execute("COMMIT")
+        except:
+            self.conn.execute("ROLLBACK")
+            raise
+        return ret
+
+    def submit(self, point, priority=0, max_attempts=3):
+        # point is any JSON document describing the job
+        cur = self.conn.execute("INSERT INTO jobs (priority, point, state, attempts, max_attempts, submitted) "
+                                "VALUES (?, ?, 'queued', 0, ?, ?)",
+                                (priority, json.dumps(point), max_attempts, time.time()))
+        return cur.lastrowid
+
+    def expire(self, now):
+        # Jobs of workers that stopped renewing their lease (crashed,
+        # killed) go back to the queue, or fail for good
+        self.conn.execute("UPDATE jobs SET state = CASE WHEN attempts < max_attempts THEN 'queued' ELSE 'failed' END, "
+                          "error = 'lease of ' || worker || ' expired', worker = NULL, lease_until = NULL "
+                          "WHERE state = 'running' AND lease_until < ?", (now,))
+
+    def claim(self, worker, lease):
+        # Highest priority first, then submission order. Returns the job id,
+        # the number of this attempt and the point.
+        def claim():
+            now = time.time()
+            self.expire(now)
+            row = self.conn.execute("SELECT job_id, point, attempts FROM jobs WHERE state = 'queued' "
+                                    "ORDER BY priority DESC, job_id LIMIT 1").fetchone()
+            if row is None:
+                return None
+            self.conn.execute("UPDATE jobs SET state = 'running', attempts = attempts + 1, worker = ?, "
+                              "lease_until = ?, started = ?, error = NULL WHERE job_id = ?",
+                              (worker, now + lease, now, row[0]))
+            return row[0], row[2] + 1, json.loads(row[1])
+        return self.transaction(claim)
+
+    def renew(self, job_id, worker, lease):
+        # False if the lease was lost in the meantime
+        cur = self.conn.execute("UPDATE jobs SET lease_until = ? WHERE job_id = ? AND worker = ? AND state = 'running'",
+                                (time.time() + lease, job_id, worker))
+        return cur.rowcount == 1
+
+    def finish(self, job_id, worker, error=None):
+        # Failed jobs are queued again until they run out of attempts
+        if error is None:
+            self.conn.execute("UPDATE jobs SET state = 'done', finished = ?, lease_until = NULL "
+                              "WHERE job_id = ? AND worker = ?", (time.time(), job_id, worker))
+        else:
+            self.conn.execute("UPDATE jobs SET state = CASE WHEN attempts < max_attempts THEN 'queued' ELSE 'failed' END, "
+                              "finished = ?, error = ?, worker = NULL, lease_until = NULL "
+                              "WHERE job_id = ? AND worker = ?", (time.time(), error, job_id, worker))
+
+    def retry_failed(self):
+        # Attempts keep being numbered after the previous ones, so that the
+        # runs they stored can be told apart from the ones of new attempts
+        cur = self.conn.execute("UPDATE jobs SET state = 'queued', max_attempts = attempts + max_attempts "
+                                "WHERE state = 'failed'")
+        return cur.rowcount
+
+    def status(self):
+        ret = { s: 0 for s in states }
+        for state, count in self.conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state"):
+            ret[state] = count
+        return ret
+
+    def close(self):
+        self.conn.close()
+
+    def __str__(self):
+        return f"<JobQueue path={self.path}>"
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+
+import logging, mmap, os
+
+# Page cache state of the inputs of a benchmark when a run starts. 'warm'
+# reads every page of the inputs in memory, 'cold' evicts them, so that
+# the first run after prepare() is not different from the others.
+policies = [ 'none', 'warm', 'cold' ]
+
+def files(paths):
+    # Regular files under paths, symlinks (in place staging) resolved
+    ret = []
+    for p in paths:
+        p = os.path.realpath(p)
+        if os.path.isdir(p):
+            for root, dirs, names in os.walk(p, followlinks=True):
+                ret += [ os.path.realpath(f"{root}/{n}") for n in names ]
+        elif os.path.isfile(p):
+            ret.append(p)
+    return [ f for f in ret if os.path.isfile(f) ]
+
+def warm(path):
+    # Touch one byte per page of a mapping of the file
+    size = os.path.getsize(path)
+    if size == 0:
+        return 0
+    with open(path, 'rb') as fp, mmap.mmap(fp.fileno(), 0, prot=mmap.PROT_READ) as m:
+        m.madvise(mmap.MADV_WILLNEED)
+        for off in range(0, size, mmap.PAGESIZE):
+            m[off]
+    return size
+
+def cold(path):
+    # Only clean pages can be dropped, write back dirty ones first
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fdatasync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+    return os.path.getsize(path)
+
+def apply(policy, paths):
+    # Bytes of input the policy was applied to
+    if policy == 'none':
+        return 0
+    fn = { 'warm': warm, 'cold': cold }[policy]
+    total = 0
+    for f in files(paths):
+        try:
+            total += fn(f)
+        except OSError as e:
+            logging.warning(f"Could not make {f} {policy}: {e}")
+    logging.debug(f"Page cache {policy}: {total} bytes")
+    return total
@@ -7,12 +7,14 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sbs
 
+import results
+
 #########################################
 
 # Parse the command line arguments
 parser = argparse.ArgumentParser(description="Plot facility")
 parser.add_argument('-i', '--input', required=True,
-                    help='Pickle/csv file where benchmark results are stored.')
+                    help='SQLite (.db), pickle or csv file where benchmark results are stored.')
 parser.add_argument('-o', '--output', required=True,
                     help='Output PDF file.')
 parser.add_argument('-b', '--baseline', required=True,
@@ -32,11 +34,8 @@ except:
     logging.basicConfig(format='[%(levelname)s] %(message)s',
                         level=logging.DEBUG)
 
-# Read input file
-if args.input.endswith(".csv"):
-    df = pd.read_csv(args.input, sep=';')
-else:
-    df = pd.read_pickle(args.input)
+# Read input file, without the warmup runs
+df = results.load(args.input)
 
 # Parse baseline arg
 try:
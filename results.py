@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+
+import logging, os, socket, sqlite3, tempfile, time
+
+# Column types used when a new column shows up in an SQLite store
+sql_types = {
+    bool: "INTEGER",
+    int: "INTEGER",
+    float: "REAL",
+    str: "TEXT"
+}
+
+def to_sql_value(v):
+    # numpy scalars (coming from pandas records) cannot be bound by sqlite3
+    if hasattr(v, 'item'):
+        v = v.item()
+    if isinstance(v, (list, tuple, set)):
+        v = ','.join([ str(x) for x in v ])
+    return v
+
+
+class ResultStore():
+
+    path = None
+    # (job_id, attempt) of the worker.py job the appended runs belong to
+    job = None
+
+    def __init__(self, path):
+        self.path = path
+
+    def append(self, records, **tables):
+        pass
+
+    def load(self, table="results"):
+        pass
+
+    def rows(self, table="results", first_run=None):
+        # Rows as dicts, without pandas. Only stores with run ids can keep
+        # the rows of runs from first_run on.
+        return self.load(table).to_dict('records')
+
+    def last_run(self):
+        # Id of the last run stored, None without run ids
+        return None
+
+    def discard_job(self, job_id, attempt):
+        # Remove the runs of the attempts of a job before this one, and
+        # return their number
+        return 0
+
+    def close(self):
+        pass
+
+    def __str__(self):
+        return f"<{type(self).__name__} path={self.path}>"
+
+
+class SqliteStore(ResultStore):
+
+    # Columns every result row is indexed on
+    keys = [ 'bench', 'arch', 'runtime', 'tag' ]
+    conn = None
+
+    def __init__(self, path):
+        super().__init__(path)
+
+        # Autocommit mode: transactions are handled explicitly in append().
+        # WAL mode lets readers and writers of one host work concurrently,
+        # but does not work across hosts over a network filesystem.
+        self.conn = sqlite3.connect(path, timeout=600, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS runs ("
+                          "run_id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                          "timestamp REAL, host TEXT, pid INTEGER, "
+                          "job_id INTEGER, attempt INTEGER)")
+        # Stores created before runs had a job
+        for col in [ 'job_id', 'attempt' ]:
+            if col not in self.columns("runs"):
+                try:
+                    self.conn.execute(f"ALTER TABLE runs ADD COLUMN {col} INTEGER")
+                except sqlite3.OperationalError:
+                    # Added by another process in the meantime
+                    pass
+        self.conn.execute("CREATE TABLE IF NOT EXISTS results ("
+                          "run_id INTEGER REFERENCES runs(run_id), "
+                          + ", ".join([ f"\"{k}\" TEXT" for k in self.keys ]) + ")")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS results_key ON results ("
+                          + ", ".join([ f"\"{k}\"" for k in self.keys ]) + ")")
+
+    def columns(self, table):
+        return [ row[1] for row in self.conn.execute(f"PRAGMA table_info(\"{table}\")") ]
+
+    def insert(self, table, run_id, records):
+        if len(records) == 0:
+            return
+
+        # Create the side table or missing columns on the fly
+        cols = self.columns(table)
+        if len(cols) == 0:
+            self.conn.execute(f"CREATE TABLE \"{table}\" (run_id INTEGER REFERENCES runs(run_id))")
+            cols = [ 'run_id' ]
+        for r in records:
+            for k, v in r.items():
+                if k in cols:
+                    continue
+                v = to_sql_value(v)
+                sql_type = sql_types.get(type(v), "")
+                self.conn.execute(f"ALTER TABLE \"{table}\" ADD COLUMN \"{k}\" {sql_type}")
+                cols.append(k)
+
+        for r in records:
+            keys = [ 'run_id' ] + [ k for k in r.keys() if k != 'run_id' ]
+            values = [ run_id ] + [ to_sql_value(r[k]) for k in keys[1:] ]
+            self.conn.execute(f"INSERT INTO \"{table}\" ("
+                              + ", ".join([ f"\"{k}\"" for k in keys ])
+                              + ") VALUES (" + ", ".join([ "?" ] * len(keys)) + ")",
+                              values)
+
+    def append(self, records, **tables):
+        # One transaction per run: either every row of the run lands on disk, or none
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            job_id, attempt = self.job if self.job is not None else (None, None)
+            cur = self.conn.execute("INSERT INTO runs (timestamp, host, pid, job_id, attempt) VALUES (?, ?, ?, ?, ?)",
+                                    (time.time(), socket.gethostname(), os.getpid(), job_id, attempt))
+            run_id = cur.lastrowid
+            self.insert("results", run_id, records)
+            for table, rows in tables.items():
+                self.insert(table, run_id, rows)
+            self.conn.execute("COMMIT")
+        except:
+            self.conn.execute("ROLLBACK")
+            raise
+        return run_id
+
+    def load(self, table="results"):
+        import pandas as pd
+        return pd.read_sql_query(f"SELECT * FROM \"{table}\"", self.conn)
+
+    def rows(self, table="results", first_run=None):
+        if first_run is None:
+            cur = self.conn.execute(f"SELECT * FROM \"{table}\"")
+        else:
+            cur = self.conn.execute(f"SELECT * FROM \"{table}\" WHERE run_id >= ?", (first_run,))
+        cols = [ d[0] for d in cur.description ]
+        return [ dict(zip(cols, row)) for row in cur ]
+
+    def last_run(self):
+        return self.conn.execute("SELECT MAX(run_id) FROM runs").fetchone()[0]
+
+    def discard_job(self, job_id, attempt):
+        # Rows of the runs go first, from the results and every side table
+        ids = "SELECT run_id FROM runs WHERE job_id = ? AND attempt < ?"
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            tables = [ r[0] for r in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'") ]
+            for table in tables:
+                if table != 'runs' and 'run_id' in self.columns(table):
+                    self.conn.execute(f"DELETE FROM \"{table}\" WHERE run_id IN ({ids})", (job_id, attempt))
+            count = self.conn.execute(f"DELETE FROM runs WHERE run_id IN ({ids})", (job_id, attempt)).rowcount
+            self.conn.execute("COMMIT")
+        except:
+            self.conn.execute("ROLLBACK")
+            raise
+        return count
+
+    def close(self):
+        self.conn.close()
+
+
+class LegacyStore(ResultStore):
+
+    def read(self, path):
+        import pandas as pd
+        if path.endswith(".csv"):
+            return pd.read_csv(path, sep=';')
+        return pd.read_pickle(path)
+
+    def write(self, df, path):
+        if self.path.endswith(".csv"):
+            df.to_csv(path, sep=';', index=False)
+        else:
+            df.to_pickle(path, protocol=4)
+
+    def append(self, records, **tables):
+        import pandas as pd
+
+        logging.warning(f"{self.path}: pickle/csv outputs are rewritten on every run, prefer a .db output")
+        if len(tables) != 0:
+            logging.warning(f"{self.path}: side tables {list(tables.keys())} are only kept by .db outputs")
+
+        df = pd.DataFrame(records)
+        if self.job is not None:
+            df['job_id'], df['attempt'] = self.job
+        try:
+            df = pd.concat([ self.read(self.path), df ], ignore_index=True)
+        except FileNotFoundError:
+            pass
+        self.replace(df)
+        return None
+
+    def discard_job(self, job_id, attempt):
+        try:
+            df = self.read(self.path)
+        except FileNotFoundError:
+            return 0
+        if 'job_id' not in df.columns:
+            return 0
+        earlier = (df['job_id'] == job_id) & (df['attempt'] < attempt)
+        if earlier.sum() != 0:
+            self.replace(df.loc[~earlier])
+        return int(earlier.sum())
+
+    def replace(self, df):
+        # Write to a temporary file first so that a crash never leaves a truncated output
+        fd, tmppath = tempfile.mkstemp(dir=os.path.dirname(self.path),
+                                       prefix=f".{os.path.basename(self.path)}.")
+        os.close(fd)
+        try:
+            self.write(df, tmppath)
+            os.replace(tmppath, self.path)
+        except:
+            os.unlink(tmppath)
+            raise
+
+    def load(self, table="results"):
+        if table != "results":
+            raise KeyError(f"{self.path} has no table {table}")
+        return self.read(self.path)
+
+
+class StoreFactory():
+
+    extensions = [ ".db", ".sqlite", ".sqlite3" ]
+
+    def create(path):
+        if any([ path.endswith(ext) for ext in StoreFactory.extensions ]):
+            return SqliteStore(path)
+        return LegacyStore(path)
+
+
+def load(path, table="results", warmup=False):
+    # Warmup runs are left out unless asked for
+    store = StoreFactory.create(path)
+    try:
+        df = store.load(table)
+    finally:
+        store.close()
+    if not warmup and 'warmup' in df.columns:
+        df = df.loc[df['warmup'] != 1].reset_index(drop=True)
+    return df
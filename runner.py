@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+
+import argparse, logging, subprocess, os, time, tempfile
+
+import pagecache, staging
+from sampler import Sampler
+from stats import relative_ci_width
+from topology import Topology, placements, parse_cpu_list, format_cpu_list
+
+# Options that do not change how a benchmark is prepared. Points of a
+# campaign that only differ by these share the same prepared benchmark.
+runtime_options = [ 'runtime', 'run_opt', 'tag', 'num_runs', 'output', 'verbose',
+                    'warmup', 'adaptive', 'min_runs', 'max_runs', 'target_ci', 'perf', 'wrap',
+                    'sample_interval', 'bb_profile', 'calibrate', 'placement', 'cpu_list',
+                    'page_cache' ]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark facility")
+    parser.add_argument('-b', '--bench', required=True,
+                        help='Benchmark to run')
+    parser.add_argument('-d', '--dataset', required=False,
+                        help='Dataset to use, benchmark specific. Use \'help\' to see a list for the requested benchmark.')
+    parser.add_argument('-r', '--runtime', required=True, choices=['native','qemu','llvm'],
+                        help='Type of runtime')
+    parser.add_argument('--run-opt', required=False,
+                        help='Command line arguments passed to the runtime system selected')
+    parser.add_argument('-o', '--output', required=True,
+                        help='SQLite (.db), pickle or csv file where results should be outputed. If file already exists, results will be appended.')
+    parser.add_argument('-a', '--arch', default='x86_64', choices=['x86_64', 'aarch64'],
+                        help='ISA to use when selecting the binary')
+    parser.add_argument('-n', '--num-threads', type=int, required=True,
+                        help='Number of threads')
+    parser.add_argument('-i', '--num-runs', type=int, default=1,
+                        help='Number of runs to perform')
+    parser.add_argument('--warmup', type=int, default=0,
+                        help='Number of runs performed first and marked as warmup in the results (default: 0)')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='Repeat runs until the confidence interval of the mean is narrow enough, instead of --num-runs times')
+    parser.add_argument('--min-runs', type=int, default=3,
+                        help='Minimum number of runs in adaptive mode (default: 3)')
+    parser.add_argument('--max-runs', type=int, default=30,
+                        help='Maximum number of runs in adaptive mode (default: 30)')
+    parser.add_argument('--target-ci', type=float, default=0.05,
+                        help='Width of the 95%% confidence interval, relative to the mean, at which adaptive mode stops (default: 0.05)')
+    parser.add_argument('-t', '--tag', type=str, default='none',
+                        help='Tag used for results (default: none)')
+    parser.add_argument('--staging', default='auto', choices=staging.policies + ['none'],
+                        help='How cached inputs are made available to runs (bind and tmpfs read them in place), \'none\' disables the input cache (default: auto)')
+    parser.add_argument('--page-cache', default='none', choices=pagecache.policies,
+                        help='Before every run, read the inputs of the benchmark in the page cache (warm) or evict them (cold) (default: none)')
+    parser.add_argument('--perf', action='store_true',
+                        help='Collect hardware performance counters with perf stat, same as --wrap perf first')
+    parser.add_argument('--wrap', action='append', metavar='TOOL[:OPTIONS]',
+                        help='Wrap the runtime with a tool adding its own columns: perf, numactl, chrt, time or strace. Can be repeated, the first one is the innermost, e.g. --wrap strace --wrap "numactl:--cpunodebind=0 --membind=0"')
+    parser.add_argument('--sample-interval', type=int, default=0,
+                        help='Sample per-thread CPU usage, RSS and I/O of the benchmark every N milliseconds, 0 disables sampling (default: 0)')
+    parser.add_argument('--bb-profile', action='store_true',
+                        help='qemu only: profile hot blocks with a TCG plugin once per binary and dataset, and pass the ranked list as BB_LIST')
+    parser.add_argument('--calibrate', action='store_true',
+                        help='Measure the startup time of the runtime with a trivial binary and report startup-corrected times')
+    parser.add_argument('--placement', default='none', choices=placements + ['none'],
+                        help='Pin the benchmark, including the runtime, to CPUs chosen from the topology for --num-threads threads (default: none)')
+    parser.add_argument('--cpu-list', type=str, default=None,
+                        help='Pin the benchmark to an explicit list of CPUs, e.g. 0-3,8, instead of a placement policy')
+    parser.add_argument('-c', '--config-file', default='./config',
+                        help='Path to a config file (default: ./config)')
+    parser.add_argument('-v', '--verbose', action='count', default=0,
+                        help='Set the verbosity level')
+    return parser
+
+
+def setup_logging(verbose):
+    try:
+        logging.basicConfig(format='[%(levelname)s] %(message)s',
+                            level={ 0: logging.ERROR,
+                                    1: logging.WARNING,
+                                    2: logging.INFO,
+                                    3: logging.DEBUG }[verbose])
+    except:
+        logging.basicConfig(format='[%(levelname)s] %(message)s',
+                            level=logging.DEBUG)
+
+
+class Run():
+
+    index = None
+    warmup = False
+    retval = None
+    duration = None
+    duration_ns = None
+    rusage = None
+
+    def __init__(self, index, warmup=False):
+        self.index = index
+        self.warmup = warmup
+
+    def metrics(self):
+        # Typed columns added to every result row of the run
+        return { 'warmup': self.warmup,
+                 'duration_ns': self.duration_ns,
+                 'utime': self.rusage.ru_utime,
+                 'stime': self.rusage.ru_stime,
+                 'maxrss_kb': self.rusage.ru_maxrss,
+                 'nvcsw': self.rusage.ru_nvcsw,
+                 'nivcsw': self.rusage.ru_nivcsw,
+                 'minflt': self.rusage.ru_minflt,
+                 'majflt': self.rusage.ru_majflt }
+
+    def __str__(self):
+        return f"<run={self.index}, retval={self.retval}, duration={self.duration}>"
+
+
+class Aborted(Exception):
+    # Raised between two runs once the abort event passed to run() or
+    # interleave() is set
+    pass
+
+
+def check(abort):
+    if abort is not None and abort.is_set():
+        raise Aborted()
+
+
+def placement(args):
+    # Placement policy and CPUs the benchmark is pinned to, if any
+    if args.cpu_list is not None:
+        cpus = parse_cpu_list(args.cpu_list)
+        allowed = os.sched_getaffinity(0)
+        if len(cpus) == 0 or not set(cpus) <= allowed:
+            logging.error(f"CPU list {args.cpu_list} is not a subset of the allowed CPUs {format_cpu_list(allowed)}")
+            exit(1)
+        return 'list', cpus
+    if args.placement == 'none':
+        return 'none', None
+    return args.placement, Topology().placement(args.placement, args.num_threads)
+
+
+def execute(args, bench, runtime, i, cwd=None):
+    # Build the complete command line
+    env = {**os.environ, **runtime.env, **bench.env}
+
+    # The child inherits the CPU set of the thread that forks it, and so
+    # do the runtime and all the threads it creates. The calling thread is
+    # pinned around Popen() rather than the child in a preexec_fn, which
+    # is not safe when other threads are running (worker.py heartbeats).
+    policy, cpus = placement(args)
+    if cpus is not None:
+        logging.info(f"Placement {policy}: CPUs {format_cpu_list(cpus)}")
+
+    # stdout is read through a pipe and parsed while the benchmark runs. It
+    # is also kept in a tmpfile, as is stderr, to be dumped afterwards.
+    with tempfile.TemporaryFile(mode="w+") as stdout, tempfile.TemporaryFile(mode="w+") as stderr:
+        # Execute a run of the benchmark. The child is reaped with wait4()
+        # to get its resource usage along with its exit status.
+        run = Run(i, warmup=(i <= args.warmup))
+        logging.info(f"Run {i}{' (warmup)' if run.warmup else ''}...")
+        parser = bench.parser()
+        cmdline = runtime.command(run, bench.cmdline)
+        page_cache_bytes = pagecache.apply(args.page_cache, bench.input_files())
+        allowed = os.sched_getaffinity(0)
+        if cpus is not None:
+            os.sched_setaffinity(0, cpus)
+        try:
+            start = time.monotonic_ns()
+            proc = subprocess.Popen(cmdline, env=env, stdout=subprocess.PIPE, stderr=stderr, cwd=cwd,
+                                    text=True, errors='replace')
+        finally:
+            if cpus is not None:
+                os.sched_setaffinity(0, allowed)
+        sampler = None
+        if args.sample_interval > 0:
+            sampler = Sampler(proc.pid, args.sample_interval)
+            sampler.start()
+        for line in proc.stdout:
+            stdout.write(line)
+            parser.feed(line)
+        _, status, run.rusage = os.wait4(proc.pid, 0)
+        end = time.monotonic_ns()
+        tables = {}
+        if sampler is not None:
+            tables['samples'] = sampler.stop()
+        proc.stdout.close()
+        proc.returncode = run.retval = os.waitstatus_to_exitcode(status)
+        run.duration_ns = end - start
+        run.duration = run.duration_ns / 1e9
+        logging.info(f"Run {i}... done (retval={run.retval}, duration={run.duration} seconds)")
+
+        # Format the output
+        logging.info("Formatting output...")
+        records = parser.records(run)
+        runtime.annotate(run, records)
+        if len(records) != 0:
+            for r in records:
+                r['runtime'] = args.runtime
+                r['tag'] = args.tag
+                r['placement'] = policy
+                r['cpus'] = format_cpu_list(cpus if cpus is not None else allowed)
+                r['page_cache'] = args.page_cache
+                r['page_cache_bytes'] = page_cache_bytes
+                r.update(run.metrics())
+            logging.info("Formatting output...done")
+        else:
+            records = None
+            logging.error(f"Failed to parse the output.")
+
+        stdout.seek(0)
+        stderr.seek(0)
+        return records, tables, stdout.read(), stderr.read()
+
+
+def cleanup(bench, runtimes):
+    # Runtimes may use files prepared for the benchmark, release them first
+    for runtime in runtimes:
+        runtime.cleanup()
+    bench.cleanup()
+
+
+def dump(out, err):
+    # Dump stdout and stderr
+    logging.info("Standard output:")
+    if out != "":
+        print(out)
+    logging.info("Standard output end.")
+    logging.info("Standard error:")
+    if err != "":
+        print(err)
+    logging.info("Standard error end.")
+
+
+def converged(args, samples):
+    n = len(next(iter(samples.values()), []))
+    if n < args.min_runs:
+        return False
+    widths = { b: relative_ci_width(v) for b, v in samples.items() }
+    logging.info(f"Relative CI widths after {n} runs: {widths}")
+    return all([ w <= args.target_ci for w in widths.values() ])
+
+
+def run(args, bench, runtime, store, abort=None):
+    runtime.prepare(bench)
+    logging.info(f"Environment: {bench.env} {runtime.env}")
+    logging.info(f"Command line: {runtime.cmdline + bench.cmdline}")
+
+    # Execute the command line
+    logging.info(f"Executing command...")
+    samples = {}
+    i = 0
+    while True:
+        i += 1
+        check(abort)
+        records, tables, out, err = execute(args, bench, runtime, i)
+        if records is not None:
+            store.append(records, **tables)
+            if i > args.warmup:
+                # Timings reported by the benchmark itself, next to the
+                # wall-clock time of the run, are not needed to converge
+                for r in records:
+                    if r.get('kind') != 'internal':
+                        samples.setdefault(r['bench'], []).append(float(r['value']))
+        dump(out, err)
+
+        if not args.adaptive and i >= args.warmup + args.num_runs:
+            break
+        if args.adaptive and i > args.warmup and (converged(args, samples) or i - args.warmup >= args.max_runs):
+            break
+    logging.info(f"Executing command... done ({i} runs)")
+
+
+def interleave(variants, bench, rng, abort=None):
+    # Runs of several (args, runtime, store) variants of the same prepared
+    # benchmark, in blocks holding one run of each variant in a random
+    # order, so that drift over time affects every variant alike
+    for args, runtime, store in variants:
+        runtime.prepare(bench)
+        logging.info(f"Variant {args.runtime}/{args.tag}: {runtime.env} {runtime.cmdline + bench.cmdline}")
+        if args.adaptive:
+            logging.warning(f"Adaptive mode is not available with interleaved runs, performing {args.num_runs} runs")
+
+    blocks = max([ args.warmup + args.num_runs for args, _, _ in variants ])
+    logging.info(f"Executing {blocks} blocks of {len(variants)} variants...")
+    for block in range(1, blocks + 1):
+        order = list(range(len(variants)))
+        rng.shuffle(order)
+        for position, v in enumerate(order):
+            args, runtime, store = variants[v]
+            if block > args.warmup + args.num_runs:
+                continue
+            check(abort)
+            records, tables, out, err = execute(args, bench, runtime, block)
+            if records is not None:
+                for r in records:
+                    r['block'] = block
+                    r['position'] = position
+                store.append(records, **tables)
+            dump(out, err)
+    logging.info(f"Executing {blocks} blocks of {len(variants)} variants... done")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+
+import hashlib, json, logging, os, platform, subprocess, time
+
+from runtimes.wrapper import Wrapper
+from cache import Cache
+from runner import Run
+from stats import relative_ci_width
+
+class Calibrated(Wrapper):
+
+    tool = "calibrate"
+
+    # Repeat the trivial binary until the mean startup time is known within 2%
+    target_ci = 0.02
+    min_runs = 10
+    max_runs = 500
+
+    trivial = None
+    cache = None
+    startup = None
+
+    def __init__(self, args, config, inner):
+        super().__init__(args, config, inner)
+
+        # llvm runs a translation of the benchmark binary, not an emulator
+        if self.name == "llvm":
+            logging.error("Startup calibration is not supported by the llvm runtime")
+            exit(1)
+
+        # A binary doing nothing, for the guest arch
+        default = "/bin/true" if args.arch == platform.machine() else None
+        self.trivial = config.store.get(f"CALIBRATION_BIN_{args.arch}", default)
+        if self.trivial is None:
+            logging.error(f"CALIBRATION_BIN_{args.arch} must be set in the configuration file to calibrate {args.arch} runtimes")
+            exit(1)
+        self.cache = Cache(config, "calibration")
+
+    def prepare(self, bench):
+        self.inner.prepare(bench)
+
+        # Calibrate once per runtime configuration: command line, environment and host
+        desc = json.dumps({ 'runtime': str(self.inner),
+                            'cmdline': self.cmdline,
+                            'env': self.env,
+                            'binary': self.cache.hash_file(self.trivial),
+                            'host': platform.node() }, sort_keys=True)
+        key = hashlib.sha256(desc.encode()).hexdigest()
+        path = self.cache.get(key, lambda d: self.calibrate(d))
+        with open(f"{path}/startup", 'r') as fp:
+            self.startup = float(fp.read())
+        logging.info(f"Startup time of {self.name}: {self.startup} seconds")
+
+    def calibrate(self, path):
+        env = { **os.environ, **self.env }
+        samples = []
+        while len(samples) < self.max_runs:
+            run = Run(len(samples) + 1)
+            cmdline = self.inner.command(run, [ self.trivial ])
+            start = time.monotonic_ns()
+            ret = subprocess.run(cmdline, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            end = time.monotonic_ns()
+            self.inner.metrics(run)
+            if ret.returncode != 0:
+                logging.error(f"Calibration run failed (retval={ret.returncode}): {cmdline}")
+                exit(1)
+            samples.append((end - start) / 1e9)
+            if len(samples) >= self.min_runs and relative_ci_width(samples) <= self.target_ci:
+                break
+        logging.info(f"Calibrated {self.name} in {len(samples)} runs")
+
+        with open(f"{path}/startup", 'w') as fp:
+            fp.write(str(sum(samples) / len(samples)))
+        with open(f"{path}/calibration.json", 'w') as fp:
+            json.dump({ 'cmdline': cmdline, 'samples': samples }, fp)
+
+    def cleanup(self):
+        self.cache.release()
+        super().cleanup()
+
+    def command(self, run, cmdline):
+        return self.inner.command(run, cmdline)
+
+    def annotate(self, run, records):
+        self.inner.annotate(run, records)
+        # Every row gets the corrected duration of its run, so that
+        # benchmarks reporting their own values (micro.math, micro.cas...)
+        # have a startup-free time too
+        duration_corrected_ns = run.duration_ns - int(self.startup * 1e9)
+        for r in records:
+            r['startup'] = self.startup
+            r['duration_corrected_ns'] = duration_corrected_ns
+            # Only the wall-clock time of the harness includes the startup
+            r['value_corrected'] = r['value'] - self.startup if r.get('kind') == 'wallclock' else None
+
+    def __str__(self):
+        ret = "<"
+        ret += f"name={self.name}"
+        ret += f", startup={self.startup}"
+        ret += f", inner={self.inner}"
+        ret += ">"
+        return ret
@@ -4,14 +4,39 @@ import logging
 
 from runtimes.native import Native
 from runtimes.qemu import Qemu
+from runtimes.llvm import Llvm
+from runtimes.perf import Perf
+from runtimes.tools import Numactl, Chrt, Time, Strace
+from runtimes.calibrated import Calibrated
+
+# Wrapper runtimes that can be stacked with --wrap
+wrappers = { w.tool: w for w in [ Perf, Numactl, Chrt, Time, Strace ] }
 
 class RuntimeFactory():
 
     def create(args, config):
+        runtime = RuntimeFactory.create_base(args, config)
+        # The first wrapper is the innermost one, --perf is a shorthand
+        # for a perf wrapper right around the runtime
+        specs = ([ "perf" ] if args.perf else []) + (args.wrap if args.wrap is not None else [])
+        for spec in specs:
+            tool, _, opts = spec.partition(':')
+            if tool not in wrappers:
+                logging.error(f"Unknown wrapper {tool}, available wrappers: {', '.join(wrappers.keys())}")
+                exit(1)
+            runtime = wrappers[tool](args, config, runtime, opts if opts != "" else None)
+        # Calibration goes last so that it measures the whole stack
+        if args.calibrate:
+            runtime = Calibrated(args, config, runtime)
+        return runtime
+
+    def create_base(args, config):
         if args.runtime == "native":
             return Native(args, config)
         if args.runtime == "qemu":
             return Qemu(args, config)
+        if args.runtime == "llvm":
+            return Llvm(args, config)
 
         logging.error("Specified runtime is not supported")
         exit(1)
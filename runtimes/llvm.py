@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+import hashlib, logging, os, subprocess, time
+
+from runtimes.runtime import Runtime
+from cache import Cache
+
+class Llvm(Runtime):
+
+    arch = None
+    translator = None
+    translator_args = None
+    version = None
+    cache = None
+    binary = None
+    translation_time = None
+    cached = None
+
+    def __init__(self, args, config):
+        super().__init__(args, config)
+        self.arch = args.arch
+
+        try:
+            self.translator = config.store["LLVM_TRANSLATOR"]
+        except KeyError:
+            logging.error("LLVM_TRANSLATOR must be set in the configuration file to use the 'llvm' runtime")
+            exit(1)
+        # {input} and {output} are replaced by the guest and translated
+        # binaries, --run-opt adds options to the translator
+        self.translator_args = config.store.get("LLVM_TRANSLATOR_ARGS", "{input} -o {output}").split(' ')
+        if self.opts != "":
+            self.translator_args += self.opts.split(' ')
+
+        # Translated binaries are only valid for one version of the translator
+        self.version = config.store.get("LLVM_TRANSLATOR_VERSION")
+        if self.version is None:
+            try:
+                ret = subprocess.run([ self.translator, "--version" ], capture_output=True, text=True)
+                self.version = ret.stdout.strip()
+            except OSError as e:
+                logging.error(f"Cannot run the translator {self.translator}: {e}")
+                exit(1)
+        self.cache = Cache(config, "llvm")
+
+        # Translated binaries run natively
+        self.cmdline = []
+
+    def prepare(self, bench):
+        guest = bench.cmdline[0]
+        version = hashlib.sha256(f"{self.translator_args}:{self.version}".encode()).hexdigest()[:16]
+        key = f"{self.cache.hash_file(guest)}-{self.arch}-{version}"
+
+        self.cached = self.cache.lookup(key) is not None
+        path = self.cache.get(key, lambda d: self.translate(guest, d))
+        self.binary = f"{path}/{os.path.basename(guest)}"
+        with open(f"{path}/translation_time", 'r') as fp:
+            self.translation_time = float(fp.read())
+        logging.info(f"Translated binary: {self.binary} (cached={self.cached}, translation_time={self.translation_time})")
+
+    def cleanup(self):
+        # Unpin the translated binary used by the runs
+        self.cache.release()
+
+    def translate(self, guest, path):
+        output = f"{path}/{os.path.basename(guest)}"
+        cmdline = [ self.translator ] + [ a.format(input=guest, output=output) for a in self.translator_args ]
+        logging.info(f"Translating: {cmdline}")
+
+        start = time.monotonic_ns()
+        ret = subprocess.run(cmdline)
+        end = time.monotonic_ns()
+        if ret.returncode != 0 or not os.path.exists(output):
+            logging.error(f"Translation of {guest} failed (retval={ret.returncode})")
+            exit(1)
+        os.chmod(output, 0o555)
+
+        with open(f"{path}/translation_time", 'w') as fp:
+            fp.write(str((end - start) / 1e9))
+
+    def command(self, run, cmdline):
+        return self.cmdline + [ self.binary ] + cmdline[1:]
+
+    def metrics(self, run):
+        return { 'translation_time': self.translation_time,
+                 'translation_cached': self.cached }
+
+    def __str__(self):
+        ret = "<"
+        ret += f"name={self.name}"
+        ret += f", translator={self.translator}"
+        ret += f", binary={self.binary}"
+        ret += ">"
+        return ret
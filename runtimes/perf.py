@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+
+from runtimes.wrapper import Wrapper
+
+class Perf(Wrapper):
+
+    tool = "perf"
+    default_bin = "perf"
+
+    # perf event -> result column
+    events = {
+        "cycles": "cycles",
+        "instructions": "instructions",
+        "branch-misses": "branch_misses",
+        "LLC-load-misses": "llc_misses",
+        "dTLB-load-misses": "dtlb_misses"
+    }
+
+    def wrap(self, output):
+        ret = [ self.binary, "stat", "-x", ",", "-o", output,
+                "-e", ",".join(self.events.keys()) ]
+        if self.opts != "":
+            ret += self.opts.split(' ')
+        return ret + [ "--" ]
+
+    def parse(self, report):
+        ret = { col: None for col in self.events.values() }
+        ret['ipc'] = None
+        if report is None:
+            return ret
+
+        for l in report.splitlines():
+            # <value>,<unit>,<event>,<run time>,<pct>,...
+            arr = l.strip().split(',')
+            if l.startswith('#') or len(arr) < 3:
+                continue
+            # Hybrid CPUs report e.g. cpu_core/cycles/, possibly with modifiers
+            event = arr[2].split('/')[-2] if '/' in arr[2] else arr[2]
+            event = event.split(':')[0]
+            if event not in self.events:
+                continue
+            try:
+                value = int(float(arr[0]))
+            except ValueError:
+                # <not supported> or <not counted>
+                continue
+            col = self.events[event]
+            ret[col] = value if ret[col] is None else ret[col] + value
+
+        if ret['cycles'] and ret['instructions'] is not None:
+            ret['ipc'] = ret['instructions'] / ret['cycles']
+        return ret
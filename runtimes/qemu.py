@@ -1,11 +1,20 @@
 #!/usr/bin/env python3
 
+import logging, os, re, subprocess
+
 from runtimes.runtime import Runtime
+from cache import Cache
+
+# One line per block in the hotblocks plugin output: pc, tcount, icount, ecount
+hotblock_re = re.compile(r"^\s*(0x[0-9a-fA-F]+),\s*(\d+),\s*(\d+),\s*(\d+)\s*$")
 
 class Qemu(Runtime):
 
     arch = None
     path = None
+    bb_profile = False
+    plugin = None
+    profile_cache = None
 
     def __init__(self, args, config):
         super().__init__(args, config)
@@ -27,5 +36,60 @@ class Qemu(Runtime):
         if self.opts != "":
             self.cmdline += self.opts.split(' ')
 
+        # Hot block profiling
+        self.bb_profile = args.bb_profile
+        if self.bb_profile:
+            self.plugin = config.store.get("QEMU_PLUGIN", f"{self.path}/contrib/plugins/libhotblocks.so")
+            if config.store.get("QEMU_PLUGIN_ARGS", "") != "":
+                self.plugin += f",{config.store['QEMU_PLUGIN_ARGS']}"
+            self.profile_cache = Cache(config, "bb_list")
+
+    def prepare(self, bench):
+        if not self.bb_profile:
+            return
+
+        # Profile once per guest binary, dataset and arch, and reuse the list afterwards
+        binary = bench.cmdline[0]
+        key = f"{self.profile_cache.hash_file(binary)}-{bench.dataset}-{self.arch}"
+        path = self.profile_cache.get(key, lambda d: self.profile(bench, d))
+        self.env["BB_LIST"] = f"{path}/bb_list"
+        logging.info(f"Using BB_LIST {self.env['BB_LIST']}")
+
+    def cleanup(self):
+        # Unpin the BB_LIST used by the runs
+        if self.profile_cache is not None:
+            self.profile_cache.release()
+
+    def profile(self, bench, path):
+        cmdline = self.cmdline + [ "-plugin", self.plugin, "-d", "plugin", "-D", f"{path}/plugin.log" ] + bench.cmdline
+        env = { **os.environ, **{ k: v for k, v in self.env.items() if k != "BB_LIST" }, **bench.env }
+        logging.info(f"Profiling hot blocks: {cmdline}")
+        ret = subprocess.run(cmdline, env=env, stdout=subprocess.DEVNULL)
+        if ret.returncode != 0:
+            logging.error(f"Profiling run failed (retval={ret.returncode})")
+            exit(1)
+
+        # Rank blocks by the number of guest instructions they executed
+        blocks = []
+        with open(f"{path}/plugin.log", 'r') as fp:
+            for l in fp:
+                m = hotblock_re.match(l)
+                if m is not None:
+                    pc, tcount, icount, ecount = m.group(1), int(m.group(2)), int(m.group(3)), int(m.group(4))
+                    blocks.append((icount * ecount, pc, tcount, icount, ecount))
+        if len(blocks) == 0:
+            logging.error(f"No block found in the plugin output {path}/plugin.log")
+            exit(1)
+        blocks.sort(reverse=True)
+
+        with open(f"{path}/histogram.csv", 'w') as fp:
+            fp.write("pc;tcount;icount;ecount;insns\n")
+            for insns, pc, tcount, icount, ecount in blocks:
+                fp.write(f"{pc};{tcount};{icount};{ecount};{insns}\n")
+        with open(f"{path}/bb_list", 'w') as fp:
+            for b in blocks:
+                fp.write(f"{b[1]}\n")
+        logging.info(f"Profiled {len(blocks)} blocks into {path}")
+
     def __str__(self):
         return super().__str__()
@@ -9,8 +9,30 @@ class Runtime():
 
     def __init__(self, args, config):
         self.name = args.runtime
+        self.env = {}
         self.opts = args.run_opt if args.run_opt is not None else ""
 
+    def prepare(self, bench):
+        # Called once before the runs of a prepared benchmark
+        pass
+
+    def command(self, run, cmdline):
+        # Complete command line of one run of the benchmark command line
+        return self.cmdline + cmdline
+
+    def metrics(self, run):
+        # Extra columns added to the result rows of one run
+        return {}
+
+    def cleanup(self):
+        # Called once the runs are done, releases what prepare() holds
+        pass
+
+    def annotate(self, run, records):
+        # Called after every run, even when no row could be parsed
+        metrics = self.metrics(run)
+        for r in records:
+            r.update(metrics)
 
     def __str__(self):
         ret = "<"
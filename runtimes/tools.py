@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+import re
+
+from runtimes.wrapper import Wrapper
+
+class Numactl(Wrapper):
+
+    tool = "numactl"
+    default_bin = "numactl"
+    default_opts = "--localalloc"
+
+    def wrap(self, output):
+        return [ self.binary ] + self.opts.split(' ') + [ "--" ]
+
+    def parse(self, report):
+        return { 'numactl': self.opts if report is not None else None }
+
+
+class Chrt(Wrapper):
+
+    tool = "chrt"
+    default_bin = "chrt"
+    default_opts = "--fifo 1"
+
+    def wrap(self, output):
+        return [ self.binary ] + self.opts.split(' ')
+
+    def parse(self, report):
+        return { 'chrt': self.opts if report is not None else None }
+
+
+class Time(Wrapper):
+
+    tool = "time"
+    default_bin = "/usr/bin/time"
+
+    # GNU time format specifier -> result column
+    fields = {
+        "%e": "time_elapsed",
+        "%U": "time_user",
+        "%S": "time_sys",
+        "%M": "time_maxrss_kb",
+        "%F": "time_majflt",
+        "%R": "time_minflt",
+        "%w": "time_nvcsw",
+        "%c": "time_nivcsw"
+    }
+
+    def wrap(self, output):
+        return [ self.binary, "-o", output, "-f", "time: " + " ".join(self.fields.keys()) ]
+
+    def parse(self, report):
+        ret = { col: None for col in self.fields.values() }
+        if report is None:
+            return ret
+        # The report may be preceded by "Command exited with non-zero status"
+        for l in report.splitlines():
+            if not l.startswith("time: "):
+                continue
+            for col, val in zip(self.fields.values(), l[6:].split()):
+                ret[col] = float(val) if '.' in val else int(val)
+        return ret
+
+
+class Strace(Wrapper):
+
+    tool = "strace"
+    default_bin = "strace"
+
+    # Summary table of strace -c:
+    #   % time     seconds  usecs/call     calls    errors syscall
+    #   ------ ----------- ----------- --------- --------- ----------------
+    #    58.52    0.000362          45         8           mmap
+    #   ------ ----------- ----------- --------- --------- ----------------
+    #   100.00    0.000619                    34         3 total
+    # Empty cells (errors, usecs/call of the total line before strace 5)
+    # make splitting on whitespace ambiguous: columns are located with the
+    # dashes under the header instead.
+    columns = { '% time': 'pct', 'seconds': 'seconds', 'usecs/call': 'usecs',
+                'calls': 'calls', 'errors': 'errors', 'syscall': 'syscall' }
+
+    def wrap(self, output):
+        ret = [ self.binary, "-c", "-f", "-o", output ]
+        if self.opts != "":
+            ret += self.opts.split(' ')
+        return ret + [ "--" ]
+
+    def parse(self, report):
+        ret = { 'syscalls': None, 'syscall_errors': None, 'syscall_seconds': None, 'syscall_top': None }
+        if report is None:
+            return ret
+        top = 0
+        spans = None
+        lines = report.splitlines()
+        for header, l in zip([ "" ] + lines, lines):
+            if l.startswith('-'):
+                # Only the separator under the header defines the columns
+                if header.lstrip().startswith('%'):
+                    spans = [ m.span() for m in re.finditer(r"-+", l) ]
+                    spans[-1] = (spans[-1][0], None)
+                    spans = { self.columns.get(header[s:e].strip()): (s, e) for s, e in spans }
+                continue
+            if spans is None or l.lstrip().startswith('%'):
+                continue
+            cells = { col: l[s:e].strip() for col, (s, e) in spans.items() if col is not None }
+            try:
+                calls = int(cells['calls'])
+                errors = int(cells['errors']) if cells.get('errors', '') != '' else 0
+                seconds = float(cells['seconds'])
+            except (KeyError, ValueError):
+                continue
+            if cells.get('syscall') == "total":
+                ret.update({ 'syscalls': calls, 'syscall_errors': errors, 'syscall_seconds': seconds })
+            elif calls > top:
+                top = calls
+                ret['syscall_top'] = cells.get('syscall')
+        return ret
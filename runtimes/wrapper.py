@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+
+import logging, os, shutil, subprocess, tempfile
+
+from runtimes.runtime import Runtime
+
+class Wrapper(Runtime):
+
+    # Name used with --wrap, and default binary and options of the tool
+    tool = None
+    default_bin = None
+    default_opts = ""
+
+    inner = None
+    binary = None
+    stack = None
+    available = False
+    output = None
+
+    def __init__(self, args, config, inner, opts=None):
+        super().__init__(args, config)
+        self.inner = inner
+        self.name = inner.name
+        self.env = inner.env
+        self.cmdline = inner.cmdline
+        self.opts = opts if opts is not None else self.default_opts
+        # Tools that actually wrap the runs, innermost first
+        self.stack = inner.stack if isinstance(inner, Wrapper) else []
+        if self.default_bin is None:
+            self.available = True
+            self.stack = self.stack + [ self.tool ]
+            return
+        self.binary = config.store.get(f"{self.tool.upper()}_BIN", self.default_bin)
+
+        # Check once that the tool can actually be used (missing, not
+        # permitted, ...), runs are not wrapped otherwise
+        if shutil.which(self.binary) is None:
+            logging.warning(f"{self.binary} not found, runs will not be wrapped with {self.tool}")
+            return
+        probe = subprocess.run(self.wrap("/dev/null") + [ "true" ],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        if probe.returncode != 0:
+            logging.warning(f"{self.tool} is not usable, runs will not be wrapped with it: {probe.stderr.strip()}")
+            return
+        self.available = True
+        self.stack = self.stack + [ self.tool ]
+
+    def wrap(self, output):
+        # Command line prefix of the tool, writing its report to output
+        return []
+
+    def parse(self, report):
+        # Columns extracted from the report of the tool, report is None
+        # when the tool could not be used
+        return {}
+
+    def prepare(self, bench):
+        self.inner.prepare(bench)
+
+    def cleanup(self):
+        self.inner.cleanup()
+
+    def command(self, run, cmdline):
+        if not self.available:
+            return self.inner.command(run, cmdline)
+        fd, self.output = tempfile.mkstemp(prefix=f"{self.tool}.")
+        os.close(fd)
+        return self.wrap(self.output) + self.inner.command(run, cmdline)
+
+    def metrics(self, run):
+        ret = self.inner.metrics(run)
+        report = None
+        if self.output is not None:
+            try:
+                with open(self.output, 'r', errors='replace') as fp:
+                    report = fp.read()
+            finally:
+                os.unlink(self.output)
+                self.output = None
+        ret.update(self.parse(report))
+        ret['wrappers'] = ','.join(self.stack) if len(self.stack) != 0 else None
+        return ret
+
+    def __str__(self):
+        ret = "<"
+        ret += f"name={self.name}"
+        ret += f", {self.tool}={self.available}"
+        ret += f", opts={self.opts}"
+        ret += f", inner={self.inner}"
+        ret += ">"
+        return ret
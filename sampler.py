@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+import glob, logging, os, threading, time
+
+clk_tck = os.sysconf('SC_CLK_TCK')
+page_kb = os.sysconf('SC_PAGE_SIZE') // 1024
+
+def read(path):
+    try:
+        with open(path, 'r') as fp:
+            return fp.read()
+    except OSError:
+        # The process or thread exited in the meantime
+        return None
+
+def process_tree(pid):
+    # pid and all its descendants, e.g. perf -> qemu -> guest threads
+    pids = [ pid ]
+    for p in pids:
+        for path in glob.glob(f"/proc/{p}/task/*/children"):
+            children = read(path)
+            if children is not None:
+                pids += [ int(c) for c in children.split() ]
+    return pids
+
+
+class Sampler(threading.Thread):
+
+    pid = None
+    interval = None
+    samples = None
+    start_ns = None
+    stopped = None
+    last = None
+
+    def __init__(self, pid, interval_ms):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval_ms / 1000
+        self.samples = []
+        self.start_ns = time.monotonic_ns()
+        self.stopped = threading.Event()
+        # Previous cpu time of every thread, to compute utilisation
+        self.last = {}
+
+    def sample(self):
+        now = time.monotonic_ns()
+        t = (now - self.start_ns) / 1e9
+        for pid in process_tree(self.pid):
+            proc = { 'rss_kb': None, 'read_bytes': None, 'write_bytes': None }
+            statm = read(f"/proc/{pid}/statm")
+            if statm is not None:
+                proc['rss_kb'] = int(statm.split()[1]) * page_kb
+            io = read(f"/proc/{pid}/io")
+            if io is not None:
+                for l in io.splitlines():
+                    key, val = l.split(':')
+                    if key in proc:
+                        proc[key] = int(val)
+
+            for path in glob.glob(f"/proc/{pid}/task/*/stat"):
+                stat = read(path)
+                if stat is None:
+                    continue
+                # comm may contain spaces, fields start after the last ')'
+                comm = stat[stat.index('(') + 1:stat.rindex(')')]
+                fields = stat[stat.rindex(')') + 2:].split()
+                tid = int(path.split('/')[4])
+                cpu_time = (int(fields[11]) + int(fields[12])) / clk_tck
+                cpu = None
+                if tid in self.last:
+                    last_t, last_cpu = self.last[tid]
+                    cpu = (cpu_time - last_cpu) / (t - last_t) if t > last_t else None
+                self.last[tid] = (t, cpu_time)
+
+                row = { 't': t, 'pid': pid, 'tid': tid, 'comm': comm, 'cpu': cpu,
+                        'processor': int(fields[36]) }
+                # Process-wide values are only reported on the main thread
+                if tid == pid:
+                    row.update(proc)
+                self.samples.append(row)
+
+    def run(self):
+        while not self.stopped.is_set():
+            try:
+                self.sample()
+            except (ValueError, IndexError) as e:
+                logging.debug(f"Sampler: {e}")
+            self.stopped.wait(self.interval)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        return self.samples
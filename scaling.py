@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+
+import argparse, logging, os, statistics
+
+import runner, stats
+from config import Config
+from results import StoreFactory, SqliteStore
+from applications.factory import BenchmarkFactory
+from runtimes.factory import RuntimeFactory
+
+# Run a benchmark for a list of thread counts and fit scaling models:
+#
+#   scaling.py --threads pow2 -- -b parsec.blackscholes -d simlarge -r qemu -o results.db -i 5
+#   scaling.py --analyze results.db
+#
+# Options after -- are bench.py options, without -n.
+
+# Units of results where lower is better. Speedups of other results are
+# ratios of throughputs.
+time_units = [ 'seconds', 's', 'ms', 'us', 'ns' ]
+
+# Columns identifying one scaling curve
+curve_keys = [ 'bench', 'dataset', 'arch', 'runtime', 'tag', 'unit' ]
+
+
+def thread_list(spec):
+    # "pow2" is every power of two up to the number of CPUs we can run on
+    if spec == 'pow2':
+        nproc = len(os.sched_getaffinity(0))
+        ret = []
+        n = 1
+        while n <= nproc:
+            ret.append(n)
+            n *= 2
+        return ret
+    try:
+        return sorted(set([ int(t) for t in spec.split(',') ]))
+    except ValueError:
+        logging.error(f"Thread list should be pow2 or a list such as 1,2,4,8, not {spec}")
+        exit(1)
+
+
+def sweep(argv, threads):
+    bench_parser = runner.build_parser()
+    for t in threads:
+        args = bench_parser.parse_args(argv + [ '-n', str(t) ])
+        args.output = os.path.abspath(args.output)
+        logging.info(f"Scaling point: {t} threads")
+
+        config = Config(args.config_file)
+        bench = BenchmarkFactory.create(args, config)
+        if bench is None:
+            logging.error("Unsupported benchmark")
+            exit(1)
+        bench.prepare()
+        store = StoreFactory.create(args.output)
+        runtimes = []
+        try:
+            runtimes.append(RuntimeFactory.create(args, config))
+            runner.run(args, bench, runtimes[0], store)
+        finally:
+            store.close()
+            runner.cleanup(bench, runtimes)
+    return args.output
+
+
+def curves(rows):
+    # Curve key -> threads -> rows, warmup runs excluded
+    ret = {}
+    for r in rows:
+        if r.get('warmup') or r.get('value') is None or r.get('threads') is None:
+            continue
+        key = tuple([ r.get(k) for k in curve_keys ])
+        ret.setdefault(key, {}).setdefault(int(r['threads']), []).append(r)
+    return ret
+
+
+def metric(name, points):
+    # Column the speedup is computed from and whether lower is better, or
+    # None when the work of a run grows with its number of threads (weak
+    # scaling, e.g. micro.cas with a number of ops per thread) and neither
+    # the time nor the value of a run can give a speedup
+    rows = [ r for runs in points.values() for r in runs ]
+    if all([ r.get('throughput') is not None for r in rows ]):
+        return 'throughput', False
+    if any([ r.get('ops_per_thread') is not None for r in rows ]):
+        return None
+    return 'value', name['unit'] in time_units
+
+
+def analyze(rows):
+    ret = []
+    for key, points in sorted(curves(rows).items(), key=lambda c: [ str(k) for k in c[0] ]):
+        name = dict(zip(curve_keys, key))
+        if 1 not in points:
+            logging.warning(f"No 1-thread run for {name}, skipping")
+            continue
+        chosen = metric(name, points)
+        if chosen is None:
+            logging.warning(f"The work of {name} grows with the number of threads and no throughput is reported, skipping")
+            continue
+        column, lower_is_better = chosen
+        means = { n: statistics.mean([ float(r[column]) for r in runs ]) for n, runs in points.items() }
+        base = means[1]
+        if base == 0 or any([ m == 0 for m in means.values() ]):
+            logging.warning(f"Null values for {name}, skipping")
+            continue
+        speedups = [ (n, base / means[n] if lower_is_better else means[n] / base) for n in sorted(means) ]
+
+        # Models need at least two thread counts
+        serial = sigma = kappa = peak = amdahl_r2 = usl_r2 = None
+        if len(speedups) > 1:
+            serial = stats.amdahl_fit(speedups)
+            if serial is not None:
+                amdahl_r2 = stats.r_squared(speedups, lambda n: stats.amdahl(n, serial))
+            fit = stats.usl_fit(speedups)
+            if fit is not None:
+                sigma, kappa = fit
+                peak = stats.usl_peak(sigma, kappa)
+                usl_r2 = stats.r_squared(speedups, lambda n: stats.usl(n, sigma, kappa))
+
+        for n, sp in speedups:
+            ret.append({ **name,
+                         'metric': column,
+                         'threads': n,
+                         'runs': len(points[n]),
+                         'mean': means[n],
+                         'speedup': sp,
+                         'efficiency': sp / n,
+                         'amdahl_serial': serial,
+                         'amdahl_r2': amdahl_r2,
+                         'usl_sigma': sigma,
+                         'usl_kappa': kappa,
+                         'usl_peak': peak,
+                         'usl_r2': usl_r2 })
+    return ret
+
+
+def fmt(v, spec):
+    return "-" if v is None else format(v, spec)
+
+
+def report(rows):
+    key = None
+    for r in rows:
+        if key != tuple([ r[k] for k in curve_keys ]):
+            key = tuple([ r[k] for k in curve_keys ])
+            print(f"\n{' '.join([ f'{k}={r[k]}' for k in curve_keys ])} (speedup of {r['metric']})")
+            print(f"  Amdahl: serial fraction {fmt(r['amdahl_serial'], '.4f')} (R2 {fmt(r['amdahl_r2'], '.3f')})")
+            print(f"  USL: sigma {fmt(r['usl_sigma'], '.4f')}, kappa {fmt(r['usl_kappa'], '.6f')}, "
+                  f"peak at {fmt(r['usl_peak'], '.1f')} threads (R2 {fmt(r['usl_r2'], '.3f')})")
+            print(f"  {'threads':>8} {'runs':>5} {'mean':>14} {'speedup':>8} {'efficiency':>10}")
+        print(f"  {r['threads']:>8} {r['runs']:>5} {r['mean']:>14.6g} {r['speedup']:>8.3f} {r['efficiency']:>10.3f}")
+
+
+######################################
+
+if __name__ == "__main__":
+    # Parse the command line arguments and options
+    parser = argparse.ArgumentParser(description="Thread scaling sweep with speedup, efficiency and Amdahl/USL fits")
+    parser.add_argument('-t', '--threads', default='pow2',
+                        help='Thread counts to run, pow2 (powers of two up to the number of CPUs) or a list such as 1,2,4,8 (default: pow2)')
+    parser.add_argument('--analyze', default=None,
+                        help='Only analyze the results already stored in this file')
+    parser.add_argument('--save', action='store_true',
+                        help='Also store the analysis in a scaling table (.db outputs only)')
+    parser.add_argument('-v', '--verbose', action='count', default=0,
+                        help='Set the verbosity level')
+    parser.add_argument('bench_args', nargs=argparse.REMAINDER,
+                        help='bench.py options, after --')
+    args = parser.parse_args()
+
+    # Setup logging
+    runner.setup_logging(args.verbose)
+
+    if args.analyze is not None:
+        output = args.analyze
+        first_run = None
+    else:
+        bench_args = args.bench_args[1:] if args.bench_args[:1] == [ '--' ] else args.bench_args
+        threads = thread_list(args.threads)
+        logging.info(f"Thread counts: {threads}")
+        # Only analyze the runs of this sweep
+        output = runner.build_parser().parse_args(bench_args + [ '-n', '1' ]).output
+        first_run = None
+        if os.path.exists(output):
+            store = StoreFactory.create(output)
+            last = store.last_run()
+            if last is not None:
+                first_run = last + 1
+            elif not isinstance(store, SqliteStore):
+                logging.warning(f"{output} has no run ids, results stored before this sweep are analyzed too")
+            store.close()
+        output = sweep(bench_args, threads)
+
+    store = StoreFactory.create(output)
+    rows = store.rows(first_run=first_run)
+    analysis = analyze(rows)
+    report(analysis)
+    if args.save:
+        store.append([], scaling=analysis)
+    store.close()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+import errno, fcntl, logging, os, shutil
+
+from cache import Cache
+
+# ioctl(2) request to share the extents of a file (see ioctl_ficlone(2))
+FICLONE = 0x40049409
+
+# Ways of making a cached input available in a run directory. 'auto'
+# tries reflink, hardlink and copy in order until one works on the
+# underlying filesystems. 'bind' uses the read-only cached files in place
+# and 'tmpfs' does the same with a cache kept in memory.
+policies = [ 'auto', 'reflink', 'hardlink', 'copy', 'symlink', 'bind', 'tmpfs' ]
+
+# Policies that make runs read the cached files themselves
+in_place = [ 'symlink', 'bind', 'tmpfs' ]
+
+default_tmpfs_dir = "/dev/shm/a2a-benchmarks-cache"
+default_tmpfs_size = "8G"
+
+def input_cache(config, name, policy):
+    if policy == 'none':
+        return None
+    if policy == 'tmpfs':
+        return Cache(config, name,
+                     root=config.store.get('TMPFS_DIR', default_tmpfs_dir),
+                     max_size=config.store.get('TMPFS_SIZE', default_tmpfs_size))
+    return Cache(config, name)
+
+def reflink(src, dst):
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        except OSError:
+            fdst.close()
+            os.unlink(dst)
+            raise
+    shutil.copymode(src, dst)
+
+def hardlink(src, dst):
+    os.link(src, dst)
+
+def copy(src, dst):
+    shutil.copy2(src, dst)
+
+def symlink(src, dst):
+    os.symlink(src, dst)
+
+methods = {
+    'reflink': reflink,
+    'hardlink': hardlink,
+    'copy': copy,
+    'symlink': symlink
+}
+
+def stage_file(src, dst, policy='auto'):
+    if policy in in_place:
+        policy = 'symlink'
+    if policy != 'auto':
+        methods[policy](src, dst)
+        return policy
+
+    for name in [ 'reflink', 'hardlink', 'copy' ]:
+        try:
+            methods[name](src, dst)
+            return name
+        except OSError as e:
+            if e.errno not in [ errno.EXDEV, errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.EPERM ]:
+                raise
+    return None
+
+def stage_tree(src, dst, policy='auto'):
+    # Recreate the directory structure of src in dst and stage every file.
+    # Directories are always fresh, so files written by the benchmark
+    # never end up in src.
+    used = set()
+    for root, dirs, files in os.walk(src):
+        rel = os.path.relpath(root, src)
+        target = os.path.normpath(f"{dst}/{rel}")
+        os.makedirs(target, exist_ok=True)
+        for f in files:
+            if os.path.islink(f"{root}/{f}"):
+                os.symlink(os.readlink(f"{root}/{f}"), f"{target}/{f}")
+                continue
+            used.add(stage_file(f"{root}/{f}", f"{target}/{f}", policy))
+    logging.debug(f"Staged {src} into {dst} using {used}")
+    return used
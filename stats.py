@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+import math, statistics
+
+# Two-sided 95% quantiles of Student's t distribution, by degrees of freedom
+t_table = {
+    1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571,
+    6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262, 10: 2.228,
+    11: 2.201, 12: 2.179, 13: 2.160, 14: 2.145, 15: 2.131,
+    16: 2.120, 17: 2.110, 18: 2.101, 19: 2.093, 20: 2.086,
+    21: 2.080, 22: 2.074, 23: 2.069, 24: 2.064, 25: 2.060,
+    26: 2.056, 27: 2.052, 28: 2.048, 29: 2.045, 30: 2.042,
+    40: 2.021, 60: 2.000, 120: 1.980
+}
+
+def t_quantile(df):
+    if df in t_table:
+        return t_table[df]
+    # Use the next smaller tabulated value, which is a conservative bound
+    for k in sorted(t_table.keys(), reverse=True):
+        if k < df:
+            return t_table[k] if df <= 120 else 1.960
+    return t_table[1]
+
+def relative_ci_width(values):
+    # Width of the 95% confidence interval of the mean, relative to the mean
+    if len(values) < 2:
+        return math.inf
+    mean = statistics.mean(values)
+    if mean == 0:
+        return math.inf
+    half = t_quantile(len(values) - 1) * statistics.stdev(values) / math.sqrt(len(values))
+    return abs(2 * half / mean)
+
+def amdahl_fit(points):
+    # Serial fraction s of Amdahl's law S(n) = 1 / (s + (1 - s) / n), fitted
+    # on (threads, speedup) points by least squares on its linear form
+    # 1/S - 1/n = s * (1 - 1/n)
+    xs = [ 1 - 1 / n for n, _ in points ]
+    ys = [ 1 / sp - 1 / n for n, sp in points ]
+    sxx = sum([ x * x for x in xs ])
+    if sxx == 0:
+        return None
+    s = sum([ x * y for x, y in zip(xs, ys) ]) / sxx
+    return min(max(s, 0.0), 1.0)
+
+def amdahl(n, s):
+    return 1 / (s + (1 - s) / n)
+
+def usl_fit(points):
+    # Contention (sigma) and coherency (kappa) coefficients of the Universal
+    # Scalability Law S(n) = n / (1 + sigma (n - 1) + kappa n (n - 1)),
+    # fitted by least squares on n/S - 1 = sigma (n - 1) + kappa n (n - 1)
+    rows = [ (n - 1, n * (n - 1), n / sp - 1) for n, sp in points ]
+    a11 = sum([ x1 * x1 for x1, _, _ in rows ])
+    a12 = sum([ x1 * x2 for x1, x2, _ in rows ])
+    a22 = sum([ x2 * x2 for _, x2, _ in rows ])
+    b1 = sum([ x1 * y for x1, _, y in rows ])
+    b2 = sum([ x2 * y for _, x2, y in rows ])
+    det = a11 * a22 - a12 * a12
+    if a11 == 0:
+        return None
+    if det != 0:
+        sigma = (b1 * a22 - b2 * a12) / det
+        kappa = (a11 * b2 - a12 * b1) / det
+    else:
+        # Two thread counts only: one coefficient can be fitted
+        sigma, kappa = b1 / a11, 0.0
+    # Both coefficients are non-negative, refit with the other one alone
+    if kappa < 0:
+        sigma, kappa = max(b1 / a11, 0.0), 0.0
+    elif sigma < 0:
+        sigma, kappa = 0.0, max(b2 / a22, 0.0)
+    return sigma, kappa
+
+def usl(n, sigma, kappa):
+    return n / (1 + sigma * (n - 1) + kappa * n * (n - 1))
+
+def usl_peak(sigma, kappa):
+    # Number of threads at which the USL speedup is maximal
+    if kappa <= 0:
+        return math.inf
+    return math.sqrt((1 - sigma) / kappa) if sigma < 1 else 1.0
+
+def r_squared(points, model):
+    mean = statistics.mean([ y for _, y in points ])
+    ss_tot = sum([ (y - mean) ** 2 for _, y in points ])
+    ss_res = sum([ (y - model(n)) ** 2 for n, y in points ])
+    return 1 - ss_res / ss_tot if ss_tot > 0 else None
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+import unittest
+
+from runtimes.tools import Strace
+
+# strace -c -f reports, as printed by strace 4 (no usecs/call on the
+# total line) and strace 6 (usecs/call everywhere)
+strace4 = """\
+% time     seconds  usecs/call     calls    errors syscall
+------ ----------- ----------- --------- --------- ----------------
+ 58.52    0.000362          45         8           mmap
+  9.85    0.000061          20         3         3 access
+  8.72    0.000054          13         4           openat
+ 22.91    0.000142           7        19           read
+------ ----------- ----------- --------- --------- ----------------
+100.00    0.000619                    34         3 total
+"""
+
+strace4_no_errors = """\
+% time     seconds  usecs/call     calls    errors syscall
+------ ----------- ----------- --------- --------- ----------------
+ 70.00    0.000070          10         7           mmap
+ 30.00    0.000030          10         3           close
+------ ----------- ----------- --------- --------- ----------------
+100.00    0.000100                    10           total
+"""
+
+strace6 = """\
+% time     seconds  usecs/call     calls    errors syscall
+------ ----------- ----------- --------- --------- ------------------
+ 27.40    0.000163          20         8           mmap
+ 24.37    0.000145          48         3         3 access
+ 48.23    0.000287          12        23           read
+------ ----------- ----------- --------- --------- ------------------
+100.00    0.000595          17        34         3 total
+"""
+
+
+class StraceParseTest(unittest.TestCase):
+
+    def parse(self, report):
+        # parse() does not need a probed tool
+        return Strace.__new__(Strace).parse(report)
+
+    def test_strace4(self):
+        self.assertEqual(self.parse(strace4), { 'syscalls': 34, 'syscall_errors': 3,
+                                                'syscall_seconds': 0.000619, 'syscall_top': 'read' })
+
+    def test_strace4_no_errors(self):
+        self.assertEqual(self.parse(strace4_no_errors), { 'syscalls': 10, 'syscall_errors': 0,
+                                                          'syscall_seconds': 0.0001, 'syscall_top': 'mmap' })
+
+    def test_strace6(self):
+        self.assertEqual(self.parse(strace6), { 'syscalls': 34, 'syscall_errors': 3,
+                                                'syscall_seconds': 0.000595, 'syscall_top': 'read' })
+
+    def test_no_report(self):
+        self.assertEqual(self.parse(None), { 'syscalls': None, 'syscall_errors': None,
+                                             'syscall_seconds': None, 'syscall_top': None })
+
+
+if __name__ == "__main__":
+    unittest.main()
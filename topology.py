@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+
+import glob, logging, os
+
+# Placement policies for the threads of a single run
+placements = [ 'compact', 'scatter', 'node', 'nosmt', 'node-nosmt' ]
+
+def parse_cpu_list(s):
+    # Parse the kernel cpu list format, e.g. "0-3,8,10-11"
+    cpus = []
+    for part in s.strip().split(','):
+        if part == "":
+            continue
+        if '-' in part:
+            first, last = part.split('-')
+            cpus += list(range(int(first), int(last) + 1))
+        else:
+            cpus.append(int(part))
+    return cpus
+
+def format_cpu_list(cpus):
+    return ','.join([ str(c) for c in sorted(cpus) ])
+
+
+class Cpu():
+
+    id = None
+    core = None
+    package = None
+    node = None
+
+    def __init__(self, id, core, package, node):
+        self.id = id
+        self.core = core
+        self.package = package
+        self.node = node
+
+    def __str__(self):
+        return f"<cpu={self.id}, core={self.core}, package={self.package}, node={self.node}>"
+
+
+class Topology():
+
+    sysfs = None
+    cpus = None
+
+    def __init__(self, sysfs="/sys/devices/system"):
+        self.sysfs = sysfs
+        self.cpus = {}
+
+        # Only consider the CPUs this process is allowed to run on
+        allowed = os.sched_getaffinity(0)
+
+        nodes = {}
+        for path in glob.glob(f"{sysfs}/node/node[0-9]*/cpulist"):
+            node = int(os.path.basename(os.path.dirname(path))[4:])
+            with open(path, 'r') as fp:
+                for c in parse_cpu_list(fp.read()):
+                    nodes[c] = node
+
+        for path in glob.glob(f"{sysfs}/cpu/cpu[0-9]*"):
+            cpu = int(os.path.basename(path)[3:])
+            if cpu not in allowed:
+                continue
+            try:
+                with open(f"{path}/topology/core_id", 'r') as fp:
+                    core = int(fp.read())
+                with open(f"{path}/topology/physical_package_id", 'r') as fp:
+                    package = int(fp.read())
+            except FileNotFoundError:
+                # Offline CPUs have no topology directory
+                continue
+            self.cpus[cpu] = Cpu(cpu, core, package, nodes.get(cpu, 0))
+
+        # Fall back to a flat topology when sysfs is not available
+        if len(self.cpus) == 0:
+            logging.warning(f"Could not read CPU topology from {sysfs}, assuming one core per CPU")
+            for cpu in allowed:
+                self.cpus[cpu] = Cpu(cpu, cpu, 0, 0)
+
+    def cores(self):
+        # Physical cores as lists of their hardware threads, sorted by node, package and core
+        cores = {}
+        for cpu in sorted(self.cpus.values(), key=lambda c: (c.node, c.package, c.core, c.id)):
+            cores.setdefault((cpu.node, cpu.package, cpu.core), []).append(cpu.id)
+        return list(cores.values())
+
+    def slots(self, count, cores_per_slot):
+        # Split the machine into disjoint sets of whole physical cores. Only
+        # the first hardware thread of each core is used, so no two slots
+        # ever share a core or an SMT sibling.
+        cores = self.cores()
+        if count * cores_per_slot > len(cores):
+            count = len(cores) // cores_per_slot
+            logging.warning(f"Only {len(cores)} physical cores available, reducing to {count} slots of {cores_per_slot} cores")
+        return [ [ core[0] for core in cores[i * cores_per_slot:(i + 1) * cores_per_slot] ]
+                 for i in range(count) ]
+
+    def nodes(self):
+        # Physical cores grouped by NUMA node
+        nodes = {}
+        for core in self.cores():
+            nodes.setdefault(self.cpus[core[0]].node, []).append(core)
+        return [ nodes[n] for n in sorted(nodes) ]
+
+    def placement(self, policy, count):
+        # count CPUs a run with count threads is pinned to:
+        #  - compact: filling SMT siblings and cores in order
+        #  - scatter: one per core round robin over the nodes, SMT siblings
+        #    only once every core is used
+        #  - node: compact, within the first NUMA node with count CPUs
+        #  - nosmt: the first hardware thread of count cores
+        #  - node-nosmt: the first hardware thread of count cores, within
+        #    the first NUMA node with count cores
+        cores = self.cores()
+        if policy == 'compact':
+            cpus = [ c for core in cores for c in core ]
+        elif policy == 'scatter':
+            nodes = self.nodes()
+            order = [ n[i] for i in range(max([ len(n) for n in nodes ])) for n in nodes if i < len(n) ]
+            cpus = [ core[t] for t in range(max([ len(c) for c in cores ])) for core in order if t < len(core) ]
+        elif policy == 'nosmt':
+            cpus = [ core[0] for core in cores ]
+        elif policy in [ 'node', 'node-nosmt' ]:
+            nodes = self.nodes()
+            if policy == 'node':
+                nodes = [ [ c for core in n for c in core ] for n in nodes ]
+            else:
+                nodes = [ [ core[0] for core in n ] for n in nodes ]
+            cpus = next((n for n in nodes if len(n) >= count), None)
+            if cpus is None:
+                cpus = max(nodes, key=len)
+        else:
+            logging.error(f"Unknown placement policy: {policy}")
+            exit(1)
+
+        if count > len(cpus):
+            logging.warning(f"Only {len(cpus)} CPUs available for placement {policy}, {count} threads requested")
+        return cpus[:count]
+
+    def __str__(self):
+        return f"<cpus={len(self.cpus)}, cores={len(self.cores())}>"
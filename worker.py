@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+
+import argparse, logging, multiprocessing, os, random, threading, time, traceback
+
+import runner
+from config import Config
+from jobqueue import JobQueue, worker_name
+from results import StoreFactory
+from topology import Topology
+from applications.factory import BenchmarkFactory
+from runtimes.factory import RuntimeFactory
+
+# Jobs are submitted with campaign.py --queue. Any number of workers on
+# this host, possibly in their own containers or CPU partitions, claim them
+# one at a time. The queue and the result stores are SQLite databases in
+# WAL mode, which needs memory shared by their users: they must be on a
+# local filesystem and cannot be shared with workers of other hosts.
+
+
+class Heartbeat(threading.Thread):
+
+    path = None
+    job_id = None
+    worker = None
+    lease = None
+    stopped = None
+    lost = None
+
+    def __init__(self, path, job_id, worker, lease):
+        super().__init__(daemon=True)
+        self.path = path
+        self.job_id = job_id
+        self.worker = worker
+        self.lease = lease
+        self.stopped = threading.Event()
+        self.lost = threading.Event()
+
+    def run(self):
+        # Renew the lease well before it expires. sqlite3 connections
+        # cannot be shared between threads, so this one has its own.
+        queue = JobQueue(self.path)
+        while not self.stopped.wait(self.lease / 3):
+            if not queue.renew(self.job_id, self.worker, self.lease):
+                # The job may already run on another worker: abort it
+                logging.warning(f"Lost the lease of job {self.job_id}, aborting it")
+                self.lost.set()
+                break
+        queue.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def discard(stores, job_id, attempt):
+    for store in stores.values():
+        count = store.discard_job(job_id, attempt)
+        if count != 0:
+            logging.info(f"Discarded {count} runs of earlier attempts of job {job_id} from {store.path}")
+
+
+def execute(job_id, attempt, point, verbose, abort=None):
+    # Same steps as bench.py, for every variant of the point
+    bench_parser = runner.build_parser()
+    variants = []
+    for argv, overrides in point['variants']:
+        args = bench_parser.parse_args(argv)
+        args.verbose = verbose
+        variants.append((args, overrides))
+    first = variants[0][0]
+
+    config = Config(first.config_file)
+    bench = BenchmarkFactory.create(first, config)
+    if bench is None:
+        logging.error(f"Unsupported benchmark {first.bench}")
+        exit(1)
+    bench.prepare()
+    logging.info(f"Benchmark is ready: {bench}")
+
+    stores = {}
+    runs = []
+    try:
+        for args, overrides in variants:
+            runtime = RuntimeFactory.create(args, config.derive(overrides))
+            logging.info(f"Runtime is ready: {runtime}")
+            if args.output not in stores:
+                stores[args.output] = StoreFactory.create(args.output)
+                stores[args.output].job = (job_id, attempt)
+            runs.append((args, runtime, stores[args.output]))
+
+        # Earlier attempts (failed midway, or whose worker lost its lease)
+        # may have stored some runs already: this attempt replaces them
+        discard(stores, job_id, attempt)
+
+        if point['interleaved']:
+            runner.interleave(runs, bench, random.Random(point['seed']), abort)
+        else:
+            for args, runtime, store in runs:
+                runner.run(args, bench, runtime, store, abort)
+        # Runs an earlier attempt may have stored before it noticed that
+        # its lease was lost
+        discard(stores, job_id, attempt)
+    finally:
+        runner.cleanup(bench, [ runtime for _, runtime, _ in runs ])
+        for store in stores.values():
+            store.close()
+
+
+def work(args, cpus=None):
+    if cpus is not None:
+        os.sched_setaffinity(0, cpus)
+    name = worker_name()
+    cwd = os.getcwd()
+    queue = JobQueue(args.queue)
+    logging.info(f"Worker {name} started{f' on CPUs {cpus}' if cpus is not None else ''}")
+
+    done = 0
+    while args.max_jobs is None or done < args.max_jobs:
+        job = queue.claim(name, args.lease)
+        if job is None:
+            if args.exit_when_empty:
+                break
+            time.sleep(args.poll)
+            continue
+
+        job_id, attempt, point = job
+        logging.info(f"Worker {name}: job {job_id} (attempt {attempt})")
+        heartbeat = Heartbeat(args.queue, job_id, name, args.lease)
+        heartbeat.start()
+        error = None
+        try:
+            execute(job_id, attempt, point, args.verbose, heartbeat.lost)
+        except runner.Aborted:
+            pass
+        except SystemExit as e:
+            error = f"exit status {e.code}"
+        except Exception:
+            error = traceback.format_exc()
+        finally:
+            heartbeat.stop()
+            # Some benchmarks chdir() in prepare()
+            os.chdir(cwd)
+        if heartbeat.lost.is_set():
+            # The job is not ours anymore, whoever holds it finishes it
+            logging.error(f"Worker {name}: job {job_id} aborted, its lease was lost")
+            done += 1
+            continue
+        if error is not None:
+            logging.error(f"Worker {name}: job {job_id} failed: {error}")
+        queue.finish(job_id, name, error)
+        done += 1
+
+    logging.info(f"Worker {name} stopped after {done} jobs")
+    queue.close()
+
+
+######################################
+
+if __name__ == "__main__":
+    # Parse the command line arguments and options
+    parser = argparse.ArgumentParser(description="Execute the jobs of a queue filled by campaign.py --queue")
+    parser.add_argument('queue',
+                        help='Job queue (SQLite file)')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help='Number of worker processes started on this host (default: 1)')
+    parser.add_argument('--cores-per-worker', type=int, default=None,
+                        help='Pin each worker to its own physical cores (default: no pinning)')
+    parser.add_argument('--lease', type=float, default=300,
+                        help='Seconds after which the job of a worker that stopped renewing it is queued again (default: 300)')
+    parser.add_argument('--poll', type=float, default=5,
+                        help='Seconds between two checks of an empty queue (default: 5)')
+    parser.add_argument('--max-jobs', type=int, default=None,
+                        help='Number of jobs after which a worker stops (default: no limit)')
+    parser.add_argument('--exit-when-empty', action='store_true',
+                        help='Stop the workers when the queue is empty instead of waiting for new jobs')
+    parser.add_argument('--status', action='store_true',
+                        help='Only print the number of jobs in each state')
+    parser.add_argument('--retry-failed', action='store_true',
+                        help='Queue failed jobs again before starting')
+    parser.add_argument('-v', '--verbose', action='count', default=0,
+                        help='Set the verbosity level')
+    args = parser.parse_args()
+
+    # Setup logging
+    runner.setup_logging(args.verbose)
+
+    queue = JobQueue(args.queue)
+    if args.status:
+        print(queue.status())
+        exit(0)
+    if args.retry_failed:
+        logging.info(f"Queued {queue.retry_failed()} failed jobs again")
+    queue.close()
+
+    slots = [ None ] * args.workers
+    if args.cores_per_worker is not None:
+        slots = Topology().slots(args.workers, args.cores_per_worker)
+        if len(slots) == 0:
+            logging.error(f"Not enough cores to run workers with {args.cores_per_worker} cores each")
+            exit(1)
+
+    if len(slots) == 1:
+        work(args, slots[0])
+    else:
+        workers = [ multiprocessing.Process(target=work, args=(args, s)) for s in slots ]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()